@@ -0,0 +1,105 @@
+from collections import namedtuple
+from collections import OrderedDict
+import itertools
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from edx.idea.schema import infer_schema, record_items
+
+
+TO_NUMPY_TYPE = {
+    'integer': 'int32',
+    'float': 'float32',
+    'double': 'float64',
+    'boolean': 'bool',
+    'tinyint': 'int8',
+    'smallint': 'int16',
+    'bigint': 'int64'
+}
+
+
+def column_array(values, data_type):
+    try:
+        return numpy.array(values, dtype=TO_NUMPY_TYPE.get(data_type, 'object'))
+    except (TypeError, ValueError):
+        # Columns containing nulls (or values that do not match the schema) cannot be stored in a typed array.
+        return numpy.array(values, dtype='object')
+
+
+class RecordBatch(object):
+
+    def __init__(self, columns):
+        self.columns = OrderedDict(columns)
+
+    def __len__(self):
+        for column in self.columns.itervalues():
+            return len(column)
+        return 0
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __setitem__(self, name, column):
+        self.columns[name] = column
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    @property
+    def names(self):
+        return tuple(self.columns.keys())
+
+    @staticmethod
+    def from_records(records, schema):
+        names = tuple(schema.fields.keys())
+        if all(getattr(record, '_fields', None) == names for record in records):
+            rows = records
+        else:
+            rows = []
+            for record in records:
+                values = dict(record_items(record))
+                rows.append(tuple(values.get(name) for name in names))
+
+        columns = OrderedDict()
+        for index, (name, field) in enumerate(schema.fields.iteritems()):
+            columns[name] = column_array([row[index] for row in rows], field.data_type)
+        return RecordBatch(columns)
+
+    def to_records(self, row_type=None):
+        row_type = row_type or namedtuple('Row', self.names)
+        return [row_type(*values) for values in itertools.izip(*[column.tolist() for column in self.columns.values()])]
+
+    def __repr__(self):
+        return 'RecordBatch(columns={0}, length={1})'.format(repr(self.names), len(self))
+
+
+class BatchMapper(object):
+
+    def __init__(self, batch_function, schema=None, batch_size=1024):
+        if numpy is None:
+            raise ImportError('numpy is required to map batches of records.')
+        self.batch_function = batch_function
+        self.schema = schema
+        self.batch_size = batch_size
+
+    def __call__(self, records):
+        schema = self.schema
+        row_types = {}
+        records = iter(records)
+        while True:
+            chunk = list(itertools.islice(records, self.batch_size))
+            if not chunk:
+                break
+            if schema is None:
+                schema = infer_schema(chunk)
+
+            result = self.batch_function(RecordBatch.from_records(chunk, schema))
+            if not isinstance(result, RecordBatch):
+                result = RecordBatch(result)
+            if result.names not in row_types:
+                row_types[result.names] = namedtuple('Row', result.names)
+            for record in result.to_records(row_types[result.names]):
+                yield record
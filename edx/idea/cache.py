@@ -0,0 +1,100 @@
+import logging
+import os
+import pickle
+import tempfile
+
+try:
+    import cloudpickle
+except ImportError:
+    cloudpickle = None
+
+from edx.idea.common.singleton import Singleton
+from edx.idea.config import Configuration
+
+
+log = logging.getLogger(__name__)
+
+DEFAULT_MAX_SIZE = 1024 * 1024 * 1024
+# Every entry starts with a small header that holds the number of records, so that they can be counted without loading
+# the records.
+HEADER = 'idea-result-1'
+
+
+class ResultCache(object):
+    __metaclass__ = Singleton
+
+    def __init__(self):
+        config = Configuration()
+        # The cache is opt-in, results are only persisted when a directory is configured.
+        self.directory = config.get_nested('result_cache', 'directory', default=None)
+        self.max_size = config.get_nested('result_cache', 'max_size', default=DEFAULT_MAX_SIZE)
+        if self.directory and not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+
+    @property
+    def enabled(self):
+        return bool(self.directory)
+
+    def path(self, fingerprint):
+        return os.path.join(self.directory, fingerprint + '.pickle')
+
+    def get(self, fingerprint):
+        return self.read(fingerprint, load_records=True)
+
+    def count(self, fingerprint):
+        return self.read(fingerprint, load_records=False)
+
+    def read(self, fingerprint, load_records):
+        path = self.path(fingerprint)
+        try:
+            with open(path, 'rb') as cache_file:
+                header = pickle.load(cache_file)
+                if not isinstance(header, tuple) or header[:1] != (HEADER,):
+                    return None
+                value = pickle.load(cache_file) if load_records else header[1]
+        except (IOError, EOFError, pickle.UnpicklingError):
+            return None
+        # The modification time records the last use of an entry so that the least recently used ones are evicted.
+        os.utime(path, None)
+        log.info('Using cached result %s', fingerprint)
+        return value
+
+    def put(self, fingerprint, records):
+        handle, temp_path = tempfile.mkstemp(dir=self.directory, prefix='.', suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as cache_file:
+                pickle.dump((HEADER, len(records)), cache_file, pickle.HIGHEST_PROTOCOL)
+                (cloudpickle or pickle).dump(records, cache_file, pickle.HIGHEST_PROTOCOL)
+            os.rename(temp_path, self.path(fingerprint))
+        except Exception:
+            log.warning('Unable to cache result %s', fingerprint, exc_info=True)
+            os.remove(temp_path)
+            return
+        self.evict()
+
+    def invalidate(self, fingerprint=None):
+        if fingerprint is None:
+            for path in self.entries():
+                os.remove(path)
+        elif os.path.exists(self.path(fingerprint)):
+            os.remove(self.path(fingerprint))
+
+    def entries(self):
+        return [
+            os.path.join(self.directory, name) for name in os.listdir(self.directory)
+            if name.endswith('.pickle') and not name.startswith('.')
+        ]
+
+    def evict(self):
+        entries = []
+        for path in self.entries():
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        total_size = sum(size for _, size, _ in entries)
+        while entries and total_size > self.max_size:
+            _, size, path = entries.pop(0)
+            log.info('Evicting cached result %s', path)
+            os.remove(path)
+            total_size -= size
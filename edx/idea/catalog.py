@@ -0,0 +1,65 @@
+import time
+
+
+class TableInfo(object):
+
+    def __init__(self, schema=None):
+        self.schema = schema
+        self.partition_key = None
+        self.partitions = None
+
+    def __repr__(self):
+        return 'TableInfo(schema={0}, partition_key={1}, partitions={2})'.format(
+            repr(self.schema),
+            repr(self.partition_key),
+            repr(self.partitions)
+        )
+
+
+class Catalog(object):
+
+    def __init__(self, ttl=60):
+        self.tables = {}
+        # Once every table in the metastore has been listed, a table that is not in the catalog does not exist. Other
+        # processes may create tables at any time, so that only holds for ttl seconds after the listing.
+        self.ttl = ttl
+        self.listed_at = None
+
+    @property
+    def complete(self):
+        return self.listed_at is not None and time.time() - self.listed_at < self.ttl
+
+    def get(self, table_name):
+        return self.tables.get(table_name.lower())
+
+    def add_table(self, table_name, schema=None):
+        info = self.tables.setdefault(table_name.lower(), TableInfo())
+        if schema:
+            info.schema = schema
+        return info
+
+    def add_tables(self, table_names):
+        listed_at = time.time()
+        for table_name in table_names:
+            self.add_table(table_name)
+        self.listed_at = listed_at
+
+    def set_partitions(self, table_name, partition_key, partition_names):
+        info = self.add_table(table_name)
+        info.partition_key = partition_key
+        info.partitions = set(partition_names)
+
+    def add_partitions(self, table_name, partition_names):
+        info = self.get(table_name)
+        if info and info.partitions is not None:
+            info.partitions.update(partition_names)
+
+    def remove_partitions(self, table_name, partition_names):
+        info = self.get(table_name)
+        if info and info.partitions is not None:
+            info.partitions.difference_update(partition_names)
+
+    def invalidate_partitions(self, table_name):
+        info = self.get(table_name)
+        if info:
+            info.partitions = None
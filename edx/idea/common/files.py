@@ -0,0 +1,47 @@
+import glob
+import os
+import tempfile
+
+
+def list_files(url):
+    path = url[len('file://'):] if url.startswith('file://') else url
+    if '://' in path:
+        raise ValueError('Only local files can be listed, unable to list {}.'.format(url))
+
+    if os.path.isdir(path):
+        paths = [os.path.join(path, name) for name in os.listdir(path) if not name.startswith(('.', '_'))]
+    else:
+        paths = glob.glob(path)
+    if not paths:
+        raise IOError('Input path does not exist: {}'.format(url))
+    return sorted(paths)
+
+
+def user_directory():
+    return os.path.join(os.path.expanduser('~'), '.cache', 'idea')
+
+
+def private_directory(path):
+    # Files in this directory are trusted, so it must not be writable or readable by other users.
+    if not os.path.isdir(path):
+        os.makedirs(path, 0o700)
+    status = os.stat(path)
+    if status.st_uid != os.getuid() or status.st_mode & 0o077:
+        raise ValueError('{} must be owned by the current user and not accessible to other users.'.format(path))
+    return path
+
+
+def replace_file(path, write):
+    # The new contents are written to a temporary file of their own that is renamed over the file, so readers and
+    # concurrent writers never see a partially written file.
+    directory = os.path.dirname(os.path.abspath(path))
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+    handle, temp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path), suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'w') as temp_file:
+            write(temp_file)
+        os.rename(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
@@ -0,0 +1,14 @@
+from collections import deque
+
+
+def iterate_partitions(submit, num_partitions, prefetch_partitions=0):
+    # submit(index) starts computing a partition and returns an object whose get() method returns its records. At most
+    # prefetch_partitions partitions are computed ahead of the one currently being consumed.
+    pending = deque()
+    next_index = 0
+    while pending or next_index < num_partitions:
+        while next_index < num_partitions and len(pending) <= prefetch_partitions:
+            pending.append(submit(next_index))
+            next_index += 1
+        for record in pending.popleft().get():
+            yield record
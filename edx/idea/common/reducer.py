@@ -0,0 +1,18 @@
+
+
+def reducer_driver(reduce_function):
+    def reducer(t):
+        key, values = t
+        for item in reduce_function(key, values):
+            yield item
+    reducer.metrics_label = 'reduce:' + getattr(reduce_function, '__name__', type(reduce_function).__name__)
+    return reducer
+
+
+def combined_reducer_driver(reduce_function):
+    def reducer(t):
+        key, value = t
+        for item in reduce_function(key, [value]):
+            yield item
+    reducer.metrics_label = 'reduce:' + getattr(reduce_function, '__name__', type(reduce_function).__name__)
+    return reducer
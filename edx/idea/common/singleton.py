@@ -1,3 +1,9 @@
+import threading
+
+
+# Instances may be created concurrently by tasks running in threads of the same process. The lock is reentrant because
+# the constructor of one singleton often creates another.
+CREATE_LOCK = threading.RLock()
 
 
 class Singleton(type):
@@ -8,5 +14,7 @@ class Singleton(type):
 
     def __call__(cls, *args, **kw):
         if cls.instance is None:
-            cls.instance = super(Singleton, cls).__call__(*args, **kw)
+            with CREATE_LOCK:
+                if cls.instance is None:
+                    cls.instance = super(Singleton, cls).__call__(*args, **kw)
         return cls.instance
@@ -2,35 +2,128 @@
 import logging.config
 import os
 
-from jinja2 import Environment, FileSystemLoader
-from jinja2.exceptions import TemplateNotFound
-import yaml
-from yaml.parser import ParserError
-
 from edx.idea.common.wrapper import MapWrapper
 
 
+CONFIG_FILE_NAME = 'config.yml'
+
+# Parsed configurations are cached per directory for the lifetime of the process. Worker processes forked after the
+# configuration was loaded inherit the cache and never read the file again unless it changes.
+CACHE = {}
+
+
+class RecordingEnviron(dict):
+    """The environment passed to the configuration template, which records the variables the template reads."""
+
+    def __init__(self, environ):
+        super(RecordingEnviron, self).__init__(environ)
+        self.accessed = set()
+        self.enumerated = False
+
+    def __getitem__(self, key):
+        self.accessed.add(key)
+        return super(RecordingEnviron, self).__getitem__(key)
+
+    def __contains__(self, key):
+        self.accessed.add(key)
+        return super(RecordingEnviron, self).__contains__(key)
+
+    def get(self, key, default=None):
+        self.accessed.add(key)
+        return super(RecordingEnviron, self).get(key, default)
+
+    def __iter__(self):
+        self.enumerated = True
+        return super(RecordingEnviron, self).__iter__()
+
+    def keys(self):
+        self.enumerated = True
+        return super(RecordingEnviron, self).keys()
+
+    def items(self):
+        self.enumerated = True
+        return super(RecordingEnviron, self).items()
+
+    def values(self):
+        self.enumerated = True
+        return super(RecordingEnviron, self).values()
+
+    def iteritems(self):
+        self.enumerated = True
+        return super(RecordingEnviron, self).iteritems()
+
+    def variables(self):
+        # A template that enumerates the environment depends on all of it.
+        names = self.keys() if self.enumerated else self.accessed
+        return dict((name, os.environ.get(name)) for name in names)
+
+
+def file_stamp(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime, stat.st_size)
+
+
+class LoadedConfiguration(object):
+
+    def __init__(self, path, stamp, variables, config):
+        self.path = path
+        self.stamp = stamp
+        self.variables = variables
+        self.config = config
+
+    def is_current(self):
+        if file_stamp(self.path) != self.stamp:
+            return False
+        return all(os.environ.get(name) == value for name, value in self.variables.iteritems())
+
+
 class Configuration(MapWrapper):
 
     def __init__(self):
-        self.config = self.load()
+        directory = os.getcwd()
+        loaded = CACHE.get(directory)
+        if loaded is None or not loaded.is_current():
+            loaded = CACHE[directory] = self.load(directory)
+
+            logging_config = loaded.config.get('logging')
+            if logging_config:
+                logging.config.dictConfig(logging_config)
+
+        self.config = loaded.config
         super(Configuration, self).__init__(self.config)
 
-        logging_config = self.config.get('logging')
-        if logging_config:
-            logging.config.dictConfig(logging_config)
+    def load(self, directory):
+        path = os.path.join(directory, CONFIG_FILE_NAME)
+        # The file is stamped before it is read so that a change made while it is being read triggers another load.
+        stamp = file_stamp(path)
+        if stamp is None:
+            return LoadedConfiguration(path, None, {}, {})
+
+        # The template and yaml libraries are only imported when there is a file to read.
+        from jinja2 import Environment, FileSystemLoader
+        from jinja2.exceptions import TemplateNotFound
+        import yaml
+        from yaml.parser import ParserError
 
-    def load(self):
-        template_env = Environment(loader=FileSystemLoader(os.getcwd()))
+        environ = RecordingEnviron(os.environ)
+        template_env = Environment(loader=FileSystemLoader(directory))
         try:
-            template = template_env.get_template('config.yml')
+            template = template_env.get_template(CONFIG_FILE_NAME)
         except TemplateNotFound:
-            return {}
-        config_yaml = template.render(env=os.environ)
+            return LoadedConfiguration(path, None, {}, {})
+        config_yaml = template.render(env=environ)
         try:
-            return yaml.load(config_yaml)
+            config = yaml.load(config_yaml) or {}
         except (IOError, ParserError):
-            return {}
+            config = {}
+        return LoadedConfiguration(path, stamp, environ.variables(), config)
+
+    @staticmethod
+    def invalidate():
+        CACHE.clear()
 
     def get_nested(self, *keys, **kwargs):
         cur = self
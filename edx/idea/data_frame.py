@@ -1,52 +1,267 @@
 
 
+from edx.idea.batch import BatchMapper
+from edx.idea.cache import ResultCache
+from edx.idea.config import Configuration
+from edx.idea.fingerprint import fingerprint, url_fingerprint, UnknownFingerprint
+from edx.idea.join import JOIN_TYPES
+from edx.idea.metrics import difference, function_name
+from edx.idea.payload import inspect_payload
+from edx.idea.plan import FILTER, MAP, PARTITION, Stage
 from edx.idea.plugin import PluginManager
+from edx.idea.schema import Schema, infer_fields
 
 
 class DataFrame(object):
 
-    def __init__(self):
+    def __init__(self, source=None, stages=()):
         self.engine = PluginManager().engine
+        # Narrow transformations are not handed to the engine immediately, instead they are accumulated in a plan that
+        # the engine compiles into a single pass over each partition of the source DataFrame when it is needed.
+        self.source = source or self
+        self.stages = stages
+        self.inferred_fields = {}
+        # Source DataFrames record where their data came from, DataFrames derived from them extend it with their stages.
+        # A lineage of None means that the result cannot be reproduced from it and is never cached.
+        self.lineage = None
+        self.action_metrics = {}
+        # The serialized size of every function shipped to the engine to compute this DataFrame, keyed by stage label.
+        self.payload_sizes = {}
 
     def map(self, map_function):
-        return self.engine.map(self, map_function)
+        return self.add_stage(Stage(MAP, map_function))
 
-    def map_reduce(self, map_function, reduce_function):
-        return self.engine.map_reduce(self, map_function, reduce_function)
+    def map_partitions(self, partition_function):
+        return self.add_stage(Stage(PARTITION, partition_function))
+
+    def map_batches(self, batch_function, batch_size=1024, schema=None):
+        schema = schema or getattr(self, 'schema', None)
+        return self.map_partitions(BatchMapper(batch_function, schema=schema, batch_size=batch_size))
+
+    def map_reduce(self, map_function, reduce_function, combine_function=None, skew=False):
+        payload_sizes = self.inspect_payloads([
+            (MAP, map_function), ('reduce', reduce_function), ('combine', combine_function)
+        ])
+        result = self.engine.map_reduce(
+            self, map_function, reduce_function, combine_function=combine_function, skew=skew
+        )
+        result.payload_sizes = payload_sizes
+        return result.derive_lineage(('map_reduce', map_function, reduce_function, combine_function), self)
+
+    def reduce_by_key(self, map_function, combine_function):
+        payload_sizes = self.inspect_payloads([(MAP, map_function), ('combine', combine_function)])
+        result = self.engine.reduce_by_key(self, map_function, combine_function)
+        result.payload_sizes = payload_sizes
+        return result.derive_lineage(('reduce_by_key', map_function, combine_function), self)
 
     def filter(self, filter_function):
-        return self.engine.filter(self, filter_function)
+        return self.add_stage(Stage(FILTER, filter_function))
+
+    def add_stage(self, stage):
+        payload_sizes = self.inspect_payloads([stage])
+        data_frame = DataFrame(source=self.source, stages=self.stages + (stage,))
+        data_frame.payload_sizes = payload_sizes
+        return data_frame
+
+    def inspect_payloads(self, functions, others=()):
+        # Returns the payload sizes of this DataFrame and the others, extended by the functions that are about to be
+        # applied to them. Functions above the configured size limit are rejected before anything is executed.
+        payload_sizes = {}
+        for data_frame in (self,) + tuple(others):
+            merge_payload_sizes(payload_sizes, data_frame.payload_sizes)
+        merge_payload_sizes(payload_sizes, inspect_functions(functions))
+        return payload_sizes
+
+    def join(self, other, key_function, other_key_function=None, how='inner'):
+        if how not in JOIN_TYPES:
+            raise ValueError('Unknown join type {0}, expected one of {1}.'.format(how, ', '.join(JOIN_TYPES)))
+        payload_sizes = self.inspect_payloads([('key', key_function), ('key', other_key_function)], [other])
+        result = self.engine.join(self, other, key_function, other_key_function=other_key_function, how=how)
+        result.payload_sizes = payload_sizes
+        return result.derive_lineage(('join', key_function, other_key_function, how), self, other)
+
+    def union(self, other):
+        return DataFrame.union_all([self, other])
+
+    def full_lineage(self):
+        if self.source.lineage is None:
+            return None
+        return self.source.lineage + tuple((stage.kind, stage.function) for stage in self.stages)
+
+    def derive_lineage(self, operation, *parents):
+        lineages = [parent.full_lineage() for parent in parents]
+        if all(lineage is not None for lineage in lineages):
+            self.lineage = (operation,) + tuple(lineages)
+        return self
+
+    def fingerprint(self):
+        return fingerprint(self.full_lineage()) if self.source.lineage is not None else None
+
+    def cached_result(self):
+        cache = ResultCache()
+        if not cache.enabled:
+            return None
+        fingerprint = self.fingerprint()
+        return cache.get(fingerprint) if fingerprint else None
+
+    def invalidate_cache(self):
+        cache = ResultCache()
+        fingerprint = self.fingerprint()
+        if cache.enabled and fingerprint:
+            cache.invalidate(fingerprint)
 
     def take(self, n_records):
-        return self.engine.take(self, n_records)
+        return self.measure(self.engine.take, n_records)
 
     def collect(self):
-        return self.engine.collect(self)
+        cache = ResultCache()
+        fingerprint = self.fingerprint() if cache.enabled else None
+        if fingerprint:
+            records = cache.get(fingerprint)
+            if records is not None:
+                return records
+
+        records = self.measure(self.engine.collect)
+        if fingerprint:
+            cache.put(fingerprint, records)
+        return records
+
+    def to_local_iterator(self, prefetch_partitions=0):
+        return self.engine.to_local_iterator(self, prefetch_partitions=prefetch_partitions)
 
     def each(self, each_function):
-        return self.engine.each(self, each_function)
+        payload_sizes = inspect_functions([('each', each_function)])
+        result = self.measure(self.engine.each, each_function)
+        self.add_action_payloads(payload_sizes)
+        return result
+
+    def each_partition(self, each_function):
+        payload_sizes = inspect_functions([('each_partition', each_function)])
+        result = self.measure(self.engine.each_partition, each_function)
+        self.add_action_payloads(payload_sizes)
+        return result
 
     def count(self):
-        return self.engine.count(self)
+        cache = ResultCache()
+        fingerprint = self.fingerprint() if cache.enabled else None
+        count = cache.count(fingerprint) if fingerprint else None
+        if count is not None:
+            return count
+        return self.measure(self.engine.count)
+
+    def to_table(self, table_name=None, schema=None, primary_key=None, append=False, skip_unchanged=False):
+        if append and skip_unchanged:
+            raise ValueError('Unchanged partitions can only be skipped when overwriting them.')
+        data_frame = self
+        records = self.cached_result()
+        if records is not None:
+            data_frame = DataFrame.from_list(records)
+            if hasattr(self, 'schema'):
+                data_frame.schema = self.schema
+        result = data_frame.measure(
+            self.engine.to_table,
+            table_name=table_name,
+            schema=schema,
+            primary_key=primary_key,
+            append=append,
+            skip_unchanged=skip_unchanged
+        )
+        self.action_metrics = data_frame.action_metrics
+        result.lineage = self.full_lineage()
+        return result
 
-    def to_table(self, table_name=None, schema=None, primary_key=None):
-        return self.engine.to_table(self, table_name=table_name, schema=schema, primary_key=primary_key)
+    def measure(self, action, *args, **kwargs):
+        before = self.engine.metrics_snapshot()
+        result = action(self, *args, **kwargs)
+        self.action_metrics = difference(self.engine.metrics_snapshot(), before) if before is not None else {}
+        return result
+
+    def add_action_payloads(self, payload_sizes):
+        # The functions passed to actions are part of the metrics of that action, DataFrames derived from this one
+        # don't ship them.
+        for label, size in payload_sizes.iteritems():
+            self.action_metrics.setdefault(label, {})['payload_bytes'] = size
+
+    def metrics(self):
+        # The records read and written and the time spent in each stage of the last action executed on this DataFrame,
+        # along with the serialized size of the function of each stage.
+        metrics = dict((label, dict(values)) for label, values in self.action_metrics.iteritems())
+        for label, size in self.payload_sizes.iteritems():
+            metrics.setdefault(label, {})['payload_bytes'] = size
+        return metrics
 
     def cache(self):
-        return self.engine.cache(self)
+        lineage = self.full_lineage()
+        result = self.engine.cache(self)
+        self.lineage = lineage
+        return result
+
+    def infer_schema(self, primary_key=None):
+        # Inferred fields are cached on the source DataFrame, keyed by the stages applied to it, so that every
+        # DataFrame with the same lineage shares them.
+        fields = self.source.inferred_fields.get(self.stages)
+        if fields is None:
+            sample_size = Configuration().get_nested('schema', 'sample_size', default=100)
+            fields = infer_fields(self.take(sample_size))
+            self.source.inferred_fields[self.stages] = fields
+        return Schema(fields=fields, primary_key=primary_key)
+
+    @staticmethod
+    def union_all(data_frames):
+        data_frames = list(data_frames)
+        if not data_frames:
+            raise ValueError('At least one DataFrame is required.')
+        result = PluginManager().engine.union(data_frames)
+        result.payload_sizes = data_frames[0].inspect_payloads([], data_frames[1:])
+        return result.derive_lineage(('union',), *data_frames)
 
     @staticmethod
     def from_sql_query(query):
         return PluginManager().engine.from_sql_query(query)
 
     @staticmethod
-    def from_table(table_name):
-        return PluginManager().engine.from_table(table_name)
+    def from_table(table_name, partitions=None, partition_filter=None):
+        return PluginManager().engine.from_table(
+            table_name, partitions=partitions, partition_filter=partition_filter
+        )
 
     @staticmethod
     def from_url(file_url):
-        return PluginManager().engine.from_url(file_url)
+        data_frame = PluginManager().engine.from_url(file_url)
+        # Lineage is only used to look up cached results, the input files are not inspected unless there is a cache.
+        if ResultCache().enabled:
+            try:
+                data_frame.lineage = (('from_url', file_url, url_fingerprint(file_url)),)
+            except UnknownFingerprint:
+                pass
+        return data_frame
 
     @staticmethod
     def from_list(data):
-        return PluginManager().engine.from_list(data)
+        data_fingerprint = None
+        if ResultCache().enabled:
+            # Only a digest of the records is kept, so that derived DataFrames do not hold on to the data.
+            data = list(data)
+            data_fingerprint = fingerprint(data)
+        data_frame = PluginManager().engine.from_list(data)
+        if data_fingerprint is not None:
+            data_frame.lineage = (('from_list', data_fingerprint),)
+        return data_frame
+
+
+def inspect_functions(functions):
+    payload_sizes = {}
+    for kind, function in functions:
+        if function is None:
+            continue
+        label = '{0}:{1}'.format(kind, function_name(function))
+        size = inspect_payload(label, function)
+        if size is not None:
+            merge_payload_sizes(payload_sizes, {label: size})
+    return payload_sizes
+
+
+def merge_payload_sizes(payload_sizes, others):
+    # Stages share a label when their functions share a name, like lambdas, the largest of their payloads is kept.
+    for label, size in others.iteritems():
+        payload_sizes[label] = max(size, payload_sizes.get(label, 0))
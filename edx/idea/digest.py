@@ -0,0 +1,44 @@
+import hashlib
+
+from edx.idea.partition import partition_name
+
+
+MODULUS = 2 ** 128
+
+
+class PartitionDigests(object):
+
+    def __init__(self, partitioned):
+        self.partitioned = partitioned
+
+    def __call__(self, rows):
+        # Each row contributes the sum of the md5 digests of its values, so the digest of a partition does not depend
+        # on the order of its rows. Rows are expected to have the partition key as their last value.
+        digests = {}
+        for row in rows:
+            name = partition_name(row[-1]) if self.partitioned else u''
+            row_digest = int(hashlib.md5(repr(tuple(row))).hexdigest(), 16)
+            total, count = digests.get(name, (0, 0))
+            digests[name] = ((total + row_digest) % MODULUS, count + 1)
+        return digests.iteritems()
+
+
+def combine_digests(digest, other_digest):
+    return ((digest[0] + other_digest[0]) % MODULUS, digest[1] + other_digest[1])
+
+
+def format_digests(digests):
+    return dict((name, '{0:032x}:{1}'.format(total, count)) for name, (total, count) in digests.iteritems())
+
+
+def changed_partitions(digests, stored_digests):
+    return set(name for name, digest in digests.iteritems() if stored_digests.get(name) != digest)
+
+
+class PartitionFilter(object):
+
+    def __init__(self, partition_names):
+        self.partition_names = partition_names
+
+    def __call__(self, row):
+        return partition_name(row[-1]) in self.partition_names
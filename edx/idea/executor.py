@@ -1,14 +1,14 @@
 
+import argparse
 import logging
-from multiprocessing import Pool
 import os
-import sys
+import time
 
-from jinja2 import Environment, FileSystemLoader
-from jinja2.exceptions import TemplateNotFound
-import yaml
-
-from edx.idea.plugin import PluginManager
+from edx.idea.config import Configuration
+from edx.idea.plugin import configure_logging
+from edx.idea.profile import Profiler
+from edx.idea.scheduler import PoolBackend, ProcessBackend, ResourcePool, TaskFailed, task_dependencies
+from edx.idea.state import StateStore, TaskHistory
 from edx.idea.workflow import Workflow
 
 
@@ -17,41 +17,253 @@ log = logging.getLogger(__name__)
 
 class Executor(object):
 
-    def __init__(self):
-        self.engine = PluginManager().engine
-        self.pool = Pool()
+    def __init__(self, incremental=False, trace_path=None):
+        from multiprocessing import cpu_count
+
+        config = Configuration()
+        self.processes = config.get_nested('executor', 'processes', default=cpu_count())
+        self.resources = ResourcePool(config.get_nested('executor', 'capacities', default={}))
+        self.retries = config.get_nested('executor', 'retries', default=0)
+        self.retry_delay = config.get_nested('executor', 'retry_delay', default=10)
+        self.speculative = config.get_nested('executor', 'speculative', default=False)
+        self.speculation_multiplier = config.get_nested('executor', 'speculation_multiplier', default=2.0)
+        self.backend_name = config.get_nested('executor', 'backend', default='pool')
+        if self.speculative and self.backend_name != 'process':
+            raise ValueError(
+                'executor.speculative requires executor.backend to be process, tasks running in the pool backend '
+                'cannot be cancelled.'
+            )
+        self.log_directory = config.get_nested('executor', 'log_directory', default=None)
+        self.state = StateStore() if incremental else None
+        self.history = TaskHistory() if self.speculative else None
+        self.fingerprints = {}
+        self.trace_path = trace_path
+
+    @property
+    def backend(self):
+        # The engine and the worker processes are only loaded once the first task is submitted.
+        if not hasattr(self, '_backend'):
+            if self.backend_name == 'process':
+                self._backend = ProcessBackend(self.log_directory)
+            else:
+                self._backend = PoolBackend(self.processes)
+        return self._backend
+
+    def validate(self, workflow):
+        dependencies = task_dependencies(workflow)
+        for task in workflow.tasks:
+            self.resources.validate(task)
+            if '://' not in task.path and not os.path.exists(task.path):
+                raise ValueError('{0} runs {1}, which does not exist.'.format(str(task), task.path))
+        return dependencies
 
     def execute(self, workflow):
         log.info('Executing %s.', str(workflow))
-        for phase in workflow.phases:
-            log.info('Executing %s.', str(phase))
-            self.pool.map(run_task, phase.tasks)
-            log.info('%s complete.', str(phase))
+        dependencies = self.validate(workflow)
+        self.tasks = dict((task.name, task) for task in workflow.tasks)
+        self.pending = list(workflow.tasks)
+        self.queued = []
+        self.completed = set()
+        self.failed = []
+        # Running attempts are keyed by the task name and the attempt number, a task may have several attempts running
+        # when it is executed speculatively.
+        self.running = {}
+        self.attempts = dict((task.name, 0) for task in workflow.tasks)
+        self.failures = dict((task.name, 0) for task in workflow.tasks)
+        self.retry_times = {}
+        self.profiler = Profiler()
+
+        try:
+            while self.pending or self.queued or self.active_attempts():
+                if not self.failed:
+                    self.start_tasks(dependencies)
+                if self.speculative:
+                    self.speculate()
+                if not self.active_attempts() and (self.failed or not self.queued):
+                    break
+                result = self.backend.wait(self.wait_timeout())
+                if result is not None:
+                    self.attempt_complete(*result)
+        except KeyboardInterrupt:
+            log.warning('Execution of %s interrupted, cancelling running tasks.', str(workflow))
+            if hasattr(self, '_backend'):
+                self._backend.terminate()
+                del self._backend
+            raise
+        finally:
+            # The execution is not over until every attempt, including the ones that lost to another attempt, exited.
+            if hasattr(self, '_backend'):
+                self._backend.close()
+                del self._backend
+            self.profiler.workflow_finished()
+            log.info(self.profiler.summary(workflow, dependencies))
+            if self.trace_path:
+                self.profiler.write_trace(workflow, self.trace_path)
+                log.info('Trace written to %s.', self.trace_path)
+
+        if self.failed:
+            raise TaskFailed('Tasks {0} of {1} failed.'.format(', '.join(self.failed), str(workflow)))
         log.info('%s complete.', str(workflow))
 
+    def start_tasks(self, dependencies):
+        # Every task is queued as soon as all of its own dependencies are complete, skipped tasks count as complete.
+        ready = [task for task in self.pending if dependencies[task.name] <= self.completed]
+        while ready:
+            for task in ready:
+                self.pending.remove(task)
+                if self.is_up_to_date(task):
+                    log.info('%s is up to date, skipping.', str(task))
+                    self.completed.add(task.name)
+                    self.profiler.task_skipped(task.name)
+                else:
+                    self.queued.append(task)
+                    self.profiler.task_queued(task.name)
+            ready = [task for task in self.pending if dependencies[task.name] <= self.completed]
 
-def run_task(task):
-    engine = PluginManager().engine
-    log.info('Executing %s.', str(task))
-    engine.run(task)
-    log.info('%s complete.', str(task))
+        # Queued tasks are started in order as long as the resources they need are available. A task that does not fit
+        # does not block smaller tasks queued after it.
+        now = time.time()
+        for task in list(self.queued):
+            if self.retry_times.get(task.name, 0) > now:
+                continue
+            if self.has_capacity(task):
+                self.queued.remove(task)
+                self.submit(task)
 
+    def active_attempts(self, name=None):
+        # Attempts of tasks that another attempt already completed are not waited for.
+        return [
+            key for key in self.running
+            if key[0] not in self.completed and (name is None or key[0] == name)
+        ]
 
-def main():
-    executor = Executor()
+    def has_capacity(self, task):
+        return len(self.running) < self.processes and self.resources.fits(task.resources)
+
+    def submit(self, task):
+        self.attempts[task.name] += 1
+        self.resources.acquire(task.resources)
+        key = (task.name, self.attempts[task.name])
+        self.running[key] = time.time()
+        self.profiler.attempt_submitted(key)
+        self.backend.submit(key, task)
+
+    def attempt_complete(self, key, error, started, finished):
+        name, attempt = key
+        task = self.tasks[name]
+        submitted = self.running.pop(key)
+        self.profiler.attempt_finished(key, error, started, finished)
+        self.resources.release(task.resources)
+        other_attempts = self.active_attempts(name)
+
+        if name in self.completed:
+            log.info('Discarding attempt %d of %s, another attempt completed first.', attempt, str(task))
+        elif not error:
+            # Other attempts are stopped before the task is complete, so that they cannot write to its outputs while
+            # the tasks that depend on it are running.
+            for other_key in other_attempts:
+                self.backend.cancel(other_key, wait=True)
+            self.completed.add(name)
+            if self.history:
+                # Backends cannot always tell when a task started, the duration is measured from the submission like
+                # the running time that speculate() compares it to.
+                self.history.record(name, finished - submitted)
+            self.task_complete(task)
+        elif other_attempts:
+            log.error('Attempt %d of %s failed, waiting for other attempts:\n%s', attempt, str(task), error)
+        else:
+            self.failures[name] += 1
+            retries = task.retries if task.retries is not None else self.retries
+            if self.failures[name] > retries:
+                log.error('Task %s failed:\n%s', name, error)
+                self.failed.append(name)
+            else:
+                # Tasks are idempotent, so they can be run again after a failure with an exponential backoff.
+                retry_delay = task.retry_delay if task.retry_delay is not None else self.retry_delay
+                delay = retry_delay * 2 ** (self.failures[name] - 1)
+                log.warning('Task %s failed, retrying in %.1f seconds:\n%s', name, delay, error)
+                self.retry_times[name] = time.time() + delay
+                self.queued.append(task)
+                self.profiler.task_queued(name)
+
+    def speculate(self):
+        # Tasks that run much longer than they usually do are started again, the first attempt to complete wins.
+        now = time.time()
+        for (name, _), start_time in self.running.items():
+            task = self.tasks[name]
+            if len(self.active_attempts(name)) != 1 or not self.has_capacity(task):
+                continue
+            expected_duration = self.history.expected_duration(name)
+            if expected_duration is None or now - start_time < self.speculation_multiplier * expected_duration:
+                continue
+            log.info(
+                '%s has been running for %.1f seconds, usually it completes in %.1f seconds, starting another attempt.',
+                str(task), now - start_time, expected_duration
+            )
+            self.submit(task)
+
+    def wait_timeout(self):
+        timeouts = []
+        if self.speculative and self.running:
+            timeouts.append(1)
+        queued_names = set(task.name for task in self.queued)
+        retry_times = [t for name, t in self.retry_times.iteritems() if name in queued_names]
+        if retry_times:
+            timeouts.append(max(0, min(retry_times) - time.time()))
+        return min(timeouts) if timeouts else None
+
+    def is_up_to_date(self, task):
+        if not self.state:
+            return False
+        # Fingerprints are computed when the task is ready to run, after the tasks that produce its inputs completed.
+        task_fingerprint = self.fingerprints[task.name] = self.state.task_fingerprint(task)
+        return self.state.is_up_to_date(task, task_fingerprint)
+
+    def task_complete(self, task):
+        if self.state:
+            self.state.record(task, self.fingerprints.get(task.name))
+            self.state.save()
+
+
+def load_workflow(workflow_yaml_path, argv):
+    from jinja2 import Environment, FileSystemLoader
+    from jinja2.exceptions import TemplateNotFound
+    import yaml
 
-    workflow_yaml_path = sys.argv[1]
     log.info('Loading workflow from yaml file %s.', workflow_yaml_path)
 
     template_env = Environment(loader=FileSystemLoader(os.getcwd()))
     try:
         template = template_env.get_template(workflow_yaml_path)
     except TemplateNotFound:
-        return
-    workflow_yaml = template.render(env=os.environ, argv=sys.argv[2:])
+        return None
+    workflow_yaml = template.render(env=os.environ, argv=argv)
 
     workflow_struct = yaml.load(workflow_yaml)
     log.debug('Parsed workflow struct = %s.', str(workflow_struct))
     workflow = Workflow.from_struct(workflow_struct)
     log.debug('Parsed workflow = %s.', str(workflow))
+    return workflow
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Execute a workflow.')
+    parser.add_argument('--incremental', action='store_true', help='skip tasks whose inputs have not changed')
+    parser.add_argument('--trace', help='write a chrome trace of the execution to this file')
+    parser.add_argument('--validate', action='store_true', help='check the workflow without executing it')
+    parser.add_argument('workflow', help='path to the workflow yaml file')
+    parser.add_argument('args', nargs=argparse.REMAINDER, help='arguments passed to the workflow template')
+    args = parser.parse_args()
+    configure_logging()
+
+    # The workflow is parsed before the engine is loaded, so that mistakes in it are reported as quickly as possible.
+    workflow = load_workflow(args.workflow, args.args)
+    if workflow is None:
+        return
+
+    executor = Executor(incremental=args.incremental, trace_path=args.trace)
+    if args.validate:
+        executor.validate(workflow)
+        log.info('%s is valid.', str(workflow))
+        return
     executor.execute(workflow)
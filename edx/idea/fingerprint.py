@@ -0,0 +1,149 @@
+import hashlib
+import os
+import pickle
+import sys
+import types
+
+from edx.idea.common.files import list_files
+
+
+class UnknownFingerprint(Exception):
+    pass
+
+
+def fingerprint(value):
+    digest = hashlib.sha1()
+    try:
+        update(digest, value, set())
+    except UnknownFingerprint:
+        return None
+    return digest.hexdigest()
+
+
+def url_fingerprint(url):
+    try:
+        paths = list_files(url)
+    except (IOError, ValueError):
+        raise UnknownFingerprint()
+    files = []
+    for path in paths:
+        stat = os.stat(path)
+        files.append((path, stat.st_mtime, stat.st_size))
+    return tuple(files)
+
+
+def update(digest, value, seen):
+    if isinstance(value, basestring):
+        # Equal str and unicode values have the same fingerprint, values loaded from JSON are always unicode.
+        digest.update('string:{0}:'.format(len(value)))
+        digest.update(value.encode('utf-8') if isinstance(value, unicode) else value)
+    elif value is None or isinstance(value, (bool, int, long, float, complex)):
+        digest.update(type(value).__name__)
+        digest.update(repr(value))
+    elif isinstance(value, (tuple, list, set, frozenset)):
+        items = sorted(value) if isinstance(value, (set, frozenset)) else value
+        digest.update('{0}:{1}'.format(type(value).__name__, len(items)))
+        for item in items:
+            update(digest, item, seen)
+    elif isinstance(value, dict):
+        digest.update('dict:{0}'.format(len(value)))
+        for key in sorted(value):
+            update(digest, key, seen)
+            update(digest, value[key], seen)
+    elif id(value) in seen:
+        digest.update('seen')
+    elif isinstance(value, types.FunctionType):
+        seen.add(id(value))
+        update_function(digest, value, seen)
+    elif isinstance(value, types.MethodType):
+        seen.add(id(value))
+        update(digest, value.__func__, seen)
+        update(digest, value.__self__, seen)
+    elif isinstance(value, types.ModuleType):
+        update_module(digest, value, (), seen)
+    elif isinstance(value, (type, types.ClassType)):
+        # The methods of a class are covered by the source file of the module that defines it.
+        digest.update('class:{0}.{1}'.format(value.__module__, value.__name__))
+        update_module(digest, sys.modules.get(value.__module__), (), seen)
+    elif isinstance(value, types.BuiltinFunctionType):
+        digest.update('builtin:{0}.{1}'.format(value.__module__, value.__name__))
+        if value.__self__ is not None and not isinstance(value.__self__, types.ModuleType):
+            # A builtin method bound to an object, like the get method of a dict, observes that object.
+            update(digest, value.__self__, seen)
+    elif isinstance(value, types.CodeType):
+        update_code(digest, value, seen)
+    elif hasattr(value, '__dict__'):
+        seen.add(id(value))
+        update(digest, type(value), seen)
+        update(digest, vars(value), seen)
+    else:
+        try:
+            digest.update(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            raise UnknownFingerprint()
+
+
+def update_function(digest, function, seen):
+    # The fingerprint of a function covers its bytecode and everything it can observe: defaults, closure variables and
+    # the globals it references. Changing a helper function or a captured lookup table changes the fingerprint.
+    code = function.func_code
+    update_code(digest, code, seen)
+    update(digest, function.func_defaults, seen)
+    for cell in function.func_closure or ():
+        update(digest, cell.cell_contents, seen)
+    names = referenced_names(code)
+    for name in names:
+        if name in function.func_globals:
+            digest.update(name)
+            value = function.func_globals[name]
+            if isinstance(value, types.ModuleType):
+                update_module(digest, value, names, seen)
+            else:
+                update(digest, value, seen)
+
+
+def update_module(digest, module, names, seen):
+    # Modules are not hashed attribute by attribute, instead the fingerprint covers their source file, which changes
+    # whenever any function or class defined in the module changes. Submodules referenced through the module by one
+    # of the names are covered too.
+    if module is None:
+        raise UnknownFingerprint()
+    digest.update('module:{0}'.format(module.__name__))
+    if id(module) in seen:
+        return
+    seen.add(id(module))
+    if module.__name__ not in sys.builtin_module_names:
+        update(digest, module_stamp(module), seen)
+    for name in names:
+        submodule = getattr(module, name, None)
+        if isinstance(submodule, types.ModuleType):
+            update_module(digest, submodule, names, seen)
+
+
+def module_stamp(module):
+    path = getattr(module, '__file__', None)
+    if not path:
+        raise UnknownFingerprint()
+    source_path = os.path.splitext(path)[0] + '.py'
+    if path.endswith(('.pyc', '.pyo')) and os.path.exists(source_path):
+        path = source_path
+    try:
+        stat = os.stat(path)
+    except OSError:
+        raise UnknownFingerprint()
+    return (path, stat.st_mtime, stat.st_size)
+
+
+def update_code(digest, code, seen):
+    digest.update(code.co_code)
+    for constant in code.co_consts:
+        update(digest, constant, seen)
+    update(digest, code.co_names, seen)
+
+
+def referenced_names(code):
+    names = set(code.co_names)
+    for constant in code.co_consts:
+        if isinstance(constant, types.CodeType):
+            names.update(referenced_names(constant))
+    return sorted(names)
@@ -0,0 +1,85 @@
+from collections import defaultdict
+
+from edx.idea.config import Configuration
+
+
+INNER = 'inner'
+LEFT = 'left'
+RIGHT = 'right'
+OUTER = 'outer'
+JOIN_TYPES = (INNER, LEFT, RIGHT, OUTER)
+
+
+def broadcast_side(data_frame, other, how):
+    # A side can be broadcast if it is small and records on it never need to be emitted without a match. Probing with
+    # take() avoids a full pass over large inputs, and the records it returns are used to build the lookup table.
+    threshold = Configuration().get_nested('join', 'broadcast_threshold', default=100000)
+    if how in (INNER, LEFT):
+        records = other.take(threshold + 1)
+        if len(records) <= threshold:
+            return RIGHT, records
+    if how in (INNER, RIGHT):
+        records = data_frame.take(threshold + 1)
+        if len(records) <= threshold:
+            return LEFT, records
+    return None, None
+
+
+def build_table(records, key_function):
+    table = defaultdict(list)
+    for record in records:
+        table[key_function(record)].append(record)
+    return dict(table)
+
+
+class KeyBy(object):
+
+    def __init__(self, key_function):
+        self.key_function = key_function
+
+    def __call__(self, record):
+        yield (self.key_function(record), record)
+
+
+class BroadcastJoin(object):
+
+    def __init__(self, table, key_function, keep_unmatched, swap=False):
+        self.table = table
+        self.key_function = key_function
+        self.keep_unmatched = keep_unmatched
+        self.swap = swap
+
+    def __call__(self, records):
+        table = self.table.value
+        for record in records:
+            key = self.key_function(record)
+            matches = table.get(key)
+            if not matches:
+                if self.keep_unmatched:
+                    matches = [None]
+                else:
+                    continue
+            for match in matches:
+                if self.swap:
+                    yield (key, (match, record))
+                else:
+                    yield (key, (record, match))
+
+
+def cogroup_joiner(how):
+    def joiner(t):
+        key, (left_records, right_records) = t
+        left_records = list(left_records)
+        right_records = list(right_records)
+        if not left_records:
+            if how in (INNER, LEFT):
+                return
+            left_records = [None]
+        if not right_records:
+            if how in (INNER, RIGHT):
+                return
+            right_records = [None]
+        for left_record in left_records:
+            for right_record in right_records:
+                yield (key, (left_record, right_record))
+    return joiner
@@ -0,0 +1,113 @@
+import logging
+import multiprocessing
+import os
+import pickle
+import tempfile
+
+try:
+    import cloudpickle
+except ImportError:
+    cloudpickle = None
+
+from edx.idea import metrics
+from edx.idea.common.singleton import Singleton
+from edx.idea.config import Configuration
+from edx.idea.local.warehouse import Warehouse
+
+
+log = logging.getLogger(__name__)
+
+
+def dumps(obj):
+    if cloudpickle:
+        return cloudpickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
+    return pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
+
+
+def run_serialized_job(payload):
+    job, partition = pickle.loads(payload)
+    result = job(partition)
+    # Metrics recorded by the worker are sent back to the driver with the result of the job.
+    return dumps((result, metrics.drain()))
+
+
+def load_result(payload):
+    result, counters = pickle.loads(payload)
+    metrics.merge(metrics.COUNTERS, counters)
+    return result
+
+
+class Broadcast(object):
+
+    def __init__(self, value):
+        self.value = value
+
+
+class SerializedResult(object):
+
+    def __init__(self, async_result):
+        self.async_result = async_result
+
+    def get(self):
+        return load_result(self.async_result.get())
+
+
+class ComputedResult(object):
+
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+
+class Context(object):
+    __metaclass__ = Singleton
+
+    def __init__(self):
+        config = Configuration()
+        self.processes = config.get_nested('local', 'processes', default=multiprocessing.cpu_count())
+        self.split_size = config.get_nested('local', 'split_size', default=32 * 1024 * 1024)
+        self.warehouse_path = config.get_nested(
+            'local', 'warehouse', default=os.path.join(tempfile.gettempdir(), 'idea', 'warehouse.db')
+        )
+        if not cloudpickle:
+            log.warning('cloudpickle is not installed, the local engine will not run jobs in parallel.')
+
+    @property
+    def pool(self):
+        if not hasattr(self, '_pool'):
+            # Workers inherit the counters the driver recorded before they were forked, they are discarded so that
+            # the workers only send back the metrics of their own jobs.
+            self._pool = multiprocessing.Pool(self.processes, initializer=metrics.drain)
+        return self._pool
+
+    @property
+    def warehouse(self):
+        if not hasattr(self, '_warehouse'):
+            self._warehouse = Warehouse(self.warehouse_path)
+        return self._warehouse
+
+    def run_job(self, partitions, job):
+        if len(partitions) <= 1 or self.processes <= 1 or not cloudpickle:
+            return [job(partition) for partition in partitions]
+
+        payloads = [dumps((job, partition)) for partition in partitions]
+        return [load_result(result) for result in self.pool.map(run_serialized_job, payloads, chunksize=1)]
+
+    def broadcast(self, value):
+        return Broadcast(value)
+
+    def submit_job(self, partition, job):
+        if self.processes <= 1 or not cloudpickle:
+            return ComputedResult(job(partition))
+        return SerializedResult(self.pool.apply_async(run_serialized_job, (dumps((job, partition)),)))
+
+    def stop(self):
+        if hasattr(self, '_pool'):
+            self._pool.close()
+            self._pool.join()
+            del self._pool
+        if hasattr(self, '_warehouse'):
+            self._warehouse.close()
+            del self._warehouse
@@ -0,0 +1,349 @@
+import bz2
+from collections import defaultdict
+import gzip
+import itertools
+import os
+
+from edx.idea.common.files import list_files
+from edx.idea.common.prefetch import iterate_partitions
+
+
+class ListPartition(object):
+
+    def __init__(self, records):
+        self.records = records
+
+    def __iter__(self):
+        return iter(self.records)
+
+
+class FileSplit(object):
+
+    def __init__(self, path, start=0, end=None):
+        self.path = path
+        self.start = start
+        self.end = end
+
+    def __iter__(self):
+        for line in self.lines():
+            yield line.rstrip('\r\n').decode('utf-8')
+
+    def lines(self):
+        if self.end is None:
+            with open_file(self.path) as text_file:
+                for line in text_file:
+                    yield line
+            return
+
+        with open(self.path, 'rb') as text_file:
+            text_file.seek(self.start)
+            if self.start != 0:
+                # The line that straddles the split boundary is read by the previous split.
+                text_file.readline()
+            position = text_file.tell()
+            while position <= self.end:
+                line = text_file.readline()
+                if not line:
+                    break
+                position += len(line)
+                yield line
+
+
+class MappedPartition(object):
+
+    def __init__(self, partition, function):
+        self.partition = partition
+        self.function = function
+
+    def __iter__(self):
+        return iter(self.function(iter(self.partition)))
+
+
+def open_file(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    elif path.endswith('.bz2'):
+        return bz2.BZ2File(path, 'rb')
+    else:
+        return open(path, 'rb')
+
+
+def slice_partitions(records, num_partitions):
+    num_partitions = max(1, min(num_partitions, len(records)))
+    size, remainder = divmod(len(records), num_partitions)
+    partitions = []
+    start = 0
+    for index in range(num_partitions):
+        end = start + size + (1 if index < remainder else 0)
+        partitions.append(ListPartition(records[start:end]))
+        start = end
+    return partitions
+
+
+class TextFile(object):
+
+    def __init__(self, url, split_size):
+        self.url = url
+        self.split_size = split_size
+
+    def __call__(self):
+        partitions = []
+        for path in list_files(self.url):
+            if path.endswith(('.gz', '.bz2')):
+                partitions.append(FileSplit(path))
+                continue
+
+            size = os.path.getsize(path)
+            start = 0
+            while True:
+                end = min(start + self.split_size, size)
+                partitions.append(FileSplit(path, start, end))
+                if end >= size:
+                    break
+                start = end
+        return partitions
+
+
+class Shuffle(object):
+
+    def __init__(self, dataset, num_partitions=None, combine_function=None):
+        self.dataset = dataset
+        self.num_partitions = num_partitions
+        self.combine_function = combine_function
+        self._partitions = None
+
+    def __call__(self):
+        if self._partitions is None:
+            num_partitions = self.num_partitions or max(1, len(self.dataset.partitions))
+            if self.combine_function:
+                groups = [dict() for _ in range(num_partitions)]
+            else:
+                groups = [defaultdict(list) for _ in range(num_partitions)]
+
+            for buckets in self.dataset.compute(Bucketize(num_partitions, self.combine_function)):
+                for index, bucket in enumerate(buckets):
+                    group = groups[index]
+                    for key, value in bucket:
+                        if not self.combine_function:
+                            group[key].extend(value)
+                        elif key in group:
+                            group[key] = self.combine_function(group[key], value)
+                        else:
+                            group[key] = value
+            self._partitions = [ListPartition(group.items()) for group in groups]
+        return self._partitions
+
+
+class Union(object):
+
+    def __init__(self, datasets):
+        self.datasets = datasets
+
+    def __call__(self):
+        partitions = []
+        for dataset in self.datasets:
+            if dataset.function is None:
+                partitions.extend(dataset.partitions)
+            else:
+                partitions.extend(MappedPartition(partition, dataset.function) for partition in dataset.partitions)
+        return partitions
+
+
+class Cache(object):
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self._partitions = None
+
+    def __call__(self):
+        if self._partitions is None:
+            self._partitions = [ListPartition(records) for records in self.dataset.compute(list)]
+        return self._partitions
+
+    def unpersist(self):
+        self._partitions = None
+
+
+class FlatMap(object):
+
+    def __init__(self, function):
+        self.function = function
+
+    def __call__(self, records):
+        for record in records:
+            for item in self.function(record):
+                yield item
+
+
+class Compose(object):
+
+    def __init__(self, first, second):
+        self.first = first
+        self.second = second
+
+    def __call__(self, records):
+        return self.second(self.first(records))
+
+
+class Bucketize(object):
+
+    def __init__(self, num_partitions, combine_function=None):
+        self.num_partitions = num_partitions
+        self.combine_function = combine_function
+
+    def __call__(self, pairs):
+        if self.combine_function:
+            return self.combine(pairs)
+
+        buckets = [defaultdict(list) for _ in range(self.num_partitions)]
+        for key, value in pairs:
+            buckets[hash(key) % self.num_partitions][key].append(value)
+        return [bucket.items() for bucket in buckets]
+
+    def combine(self, pairs):
+        buckets = [dict() for _ in range(self.num_partitions)]
+        for key, value in pairs:
+            bucket = buckets[hash(key) % self.num_partitions]
+            if key in bucket:
+                bucket[key] = self.combine_function(bucket[key], value)
+            else:
+                bucket[key] = value
+        return [bucket.items() for bucket in buckets]
+
+
+class Foreach(object):
+
+    def __init__(self, function):
+        self.function = function
+
+    def __call__(self, records):
+        for record in records:
+            self.function(record)
+
+
+class Take(object):
+
+    def __init__(self, n_records):
+        self.n_records = n_records
+
+    def __call__(self, records):
+        return list(itertools.islice(records, self.n_records))
+
+
+class Tag(object):
+
+    def __init__(self, index):
+        self.index = index
+
+    def __call__(self, pairs):
+        for key, value in pairs:
+            yield (key, (self.index, value))
+
+
+def split_tagged(t):
+    key, tagged_values = t
+    values = ([], [])
+    for index, value in tagged_values:
+        values[index].append(value)
+    yield (key, values)
+
+
+class ForeachPartition(object):
+
+    def __init__(self, function):
+        self.function = function
+
+    def __call__(self, records):
+        self.function(records)
+
+
+def count_records(records):
+    return sum(1 for _ in records)
+
+
+class Job(object):
+
+    def __init__(self, function, action):
+        self.function = function
+        self.action = action
+
+    def __call__(self, partition):
+        records = iter(partition)
+        if self.function is not None:
+            records = self.function(records)
+        return self.action(records)
+
+
+class Dataset(object):
+
+    def __init__(self, context, source, function=None):
+        self.context = context
+        self.source = source
+        self.function = function
+
+    @property
+    def partitions(self):
+        if callable(self.source):
+            return self.source()
+        return self.source
+
+    def map_partitions(self, function):
+        if self.function is not None:
+            function = Compose(self.function, function)
+        return Dataset(self.context, self.source, function)
+
+    def flat_map(self, function):
+        return self.map_partitions(FlatMap(function))
+
+    def group_by_key(self, num_partitions=None):
+        return Dataset(self.context, Shuffle(self, num_partitions))
+
+    def reduce_by_key(self, combine_function, num_partitions=None):
+        return Dataset(self.context, Shuffle(self, num_partitions, combine_function))
+
+    def cogroup(self, other):
+        return self.map_partitions(Tag(0)).union(other.map_partitions(Tag(1))).group_by_key().flat_map(split_tagged)
+
+    def union(self, *others):
+        return Dataset(self.context, Union((self,) + others))
+
+    def cache(self):
+        return Dataset(self.context, Cache(self))
+
+    def unpersist(self):
+        if isinstance(self.source, Cache):
+            self.source.unpersist()
+
+    def compute(self, action):
+        return self.context.run_job(self.partitions, Job(self.function, action))
+
+    def collect(self):
+        return list(itertools.chain.from_iterable(self.compute(list)))
+
+    def count(self):
+        return sum(self.compute(count_records))
+
+    def to_local_iterator(self, prefetch_partitions=0):
+        partitions = self.partitions
+        job = Job(self.function, list)
+
+        def submit(index):
+            return self.context.submit_job(partitions[index], job)
+
+        return iterate_partitions(submit, len(partitions), prefetch_partitions)
+
+    def foreach(self, function):
+        self.compute(Foreach(function))
+
+    def foreach_partition(self, function):
+        self.compute(ForeachPartition(function))
+
+    def take(self, n_records):
+        # Partitions are read lazily in the driver so that only as much input as necessary is consumed.
+        records = []
+        for partition in self.partitions:
+            remaining = n_records - len(records)
+            if remaining <= 0:
+                break
+            records.extend(Job(self.function, Take(remaining))(partition))
+        return records
@@ -0,0 +1,286 @@
+import atexit
+import logging
+import subprocess
+import sys
+
+from edx.idea.common.reducer import combined_reducer_driver, reducer_driver
+from edx.idea.config import Configuration
+from edx.idea.data_frame import DataFrame
+from edx.idea.digest import PartitionDigests, PartitionFilter, changed_partitions, format_digests
+from edx.idea.join import LEFT, RIGHT, BroadcastJoin, KeyBy, broadcast_side, build_table, cogroup_joiner
+from edx.idea.local.context import Context
+from edx.idea.local.dataset import Dataset, TextFile, slice_partitions
+from edx.idea.local.warehouse import Query, table_columns
+from edx.idea.metrics import (
+    LocalMetricsSink, MeasuredEach, MeasuredPipeline, log_metrics, metrics_enabled, snapshot
+)
+from edx.idea.partition import partition_name, select_partitions
+from edx.idea.plan import FILTER, MAP, PARTITION, Pipeline, Stage
+from edx.idea.schema import RowConverter
+from edx.idea.skew import (
+    SaltKeys, SampleKeys, SkewSettings, detect_hot_keys, is_final, is_partial, salted_reducer_driver, to_final,
+    to_partial
+)
+
+
+log = logging.getLogger(__name__)
+
+
+class LocalEngine(object):
+
+    @property
+    def context(self):
+        if not hasattr(self, '_context'):
+            self._context = Context()
+        return self._context
+
+    @property
+    def metrics_sink(self):
+        if not hasattr(self, '_metrics_sink'):
+            self._metrics_sink = None
+            if metrics_enabled():
+                self._metrics_sink = LocalMetricsSink()
+                atexit.register(log_metrics, self.metrics_snapshot)
+        return self._metrics_sink
+
+    def metrics_snapshot(self):
+        if self.metrics_sink is None:
+            return None
+        return snapshot()
+
+    def compile(self, data_frame, *stages):
+        stages = data_frame.stages + stages
+        dataset = data_frame.source.dataset
+        if stages:
+            dataset = dataset.map_partitions(self.pipeline(*stages))
+        return dataset
+
+    def pipeline(self, *stages):
+        if self.metrics_sink is None:
+            return Pipeline(stages)
+        return MeasuredPipeline(stages, self.metrics_sink)
+
+    def reduce_pipeline(self, reducer):
+        return self.pipeline(Stage(MAP, reducer))
+
+    def map_reduce(self, data_frame, map_function, reduce_function, combine_function=None, skew=False):
+        mapped_dataset = self.compile(data_frame, Stage(MAP, map_function))
+        if combine_function:
+            reducer = self.reduce_pipeline(combined_reducer_driver(reduce_function))
+            return self.from_dataset(mapped_dataset.reduce_by_key(combine_function).map_partitions(reducer), data_frame)
+
+        merge_function = getattr(reduce_function, 'merge_function', None)
+        if skew and merge_function:
+            return self.skewed_map_reduce(data_frame, mapped_dataset, reduce_function, merge_function)
+        elif skew:
+            log.warning('Reduce function %s is not mergeable, skewed keys will not be salted.', repr(reduce_function))
+
+        reducer = self.reduce_pipeline(reducer_driver(reduce_function))
+        return self.from_dataset(mapped_dataset.group_by_key().map_partitions(reducer), data_frame)
+
+    def skewed_map_reduce(self, data_frame, mapped_dataset, reduce_function, merge_function):
+        settings = SkewSettings()
+        hot_keys = detect_hot_keys(
+            mapped_dataset.map_partitions(SampleKeys(settings.sample_fraction)).collect(), settings.threshold
+        )
+        log.info('Salting hot keys %s.', repr(sorted(hot_keys)))
+
+        reduced_dataset = mapped_dataset.map_partitions(SaltKeys(hot_keys, settings.salts)).group_by_key() \
+            .map_partitions(self.reduce_pipeline(salted_reducer_driver(reduce_function))).cache()
+        partial = self.pipeline(Stage(FILTER, is_partial), Stage(MAP, to_partial))
+        merger = self.reduce_pipeline(reducer_driver(merge_function))
+        merged_dataset = reduced_dataset.map_partitions(partial).group_by_key().map_partitions(merger)
+        final_dataset = reduced_dataset.map_partitions(self.pipeline(Stage(FILTER, is_final), Stage(MAP, to_final)))
+
+        result = self.from_dataset(final_dataset.union(merged_dataset), data_frame)
+        # Both sides of the union read the reduced records, they are kept in memory until the union has been computed.
+        result.persisted.append(reduced_dataset)
+        result.salted_keys = hot_keys
+        return result
+
+    def reduce_by_key(self, data_frame, map_function, combine_function):
+        return self.from_dataset(
+            self.compile(data_frame, Stage(MAP, map_function)).reduce_by_key(combine_function), data_frame
+        )
+
+    def join(self, data_frame, other, key_function, other_key_function=None, how='inner'):
+        other_key_function = other_key_function or key_function
+        side, records = broadcast_side(data_frame, other, how)
+        if side == RIGHT:
+            log.info('Broadcasting the right side of the join.')
+            table = self.context.broadcast(build_table(records, other_key_function))
+            join_stage = Stage(PARTITION, BroadcastJoin(table, key_function, keep_unmatched=(how == LEFT)))
+            return self.from_dataset(self.compile(data_frame, join_stage), data_frame, other)
+        elif side == LEFT:
+            log.info('Broadcasting the left side of the join.')
+            table = self.context.broadcast(build_table(records, key_function))
+            join_stage = Stage(
+                PARTITION, BroadcastJoin(table, other_key_function, keep_unmatched=(how == RIGHT), swap=True)
+            )
+            return self.from_dataset(self.compile(other, join_stage), data_frame, other)
+
+        left_dataset = self.compile(data_frame, Stage(MAP, KeyBy(key_function)))
+        right_dataset = self.compile(other, Stage(MAP, KeyBy(other_key_function)))
+        return self.from_dataset(left_dataset.cogroup(right_dataset).flat_map(cogroup_joiner(how)), data_frame, other)
+
+    def union(self, data_frames):
+        datasets = [self.compile(data_frame) for data_frame in data_frames]
+        return self.from_dataset(datasets[0].union(*datasets[1:]), *data_frames)
+
+    def take(self, data_frame, n_records):
+        return self.compile(data_frame).take(n_records)
+
+    def collect(self, data_frame):
+        records = self.compile(data_frame).collect()
+        self.release(data_frame)
+        return records
+
+    def to_local_iterator(self, data_frame, prefetch_partitions=0):
+        try:
+            for record in self.compile(data_frame).to_local_iterator(prefetch_partitions):
+                yield record
+        finally:
+            self.release(data_frame)
+
+    def each(self, data_frame, each_function):
+        dataset = self.compile(data_frame)
+        if self.metrics_sink is not None:
+            dataset.foreach_partition(MeasuredEach(each_function, self.metrics_sink))
+        else:
+            dataset.foreach(each_function)
+        self.release(data_frame)
+
+    def each_partition(self, data_frame, each_function):
+        self.compile(data_frame).foreach_partition(each_function)
+        self.release(data_frame)
+
+    def count(self, data_frame):
+        n_records = self.compile(data_frame).count()
+        self.release(data_frame)
+        return n_records
+
+    def cache(self, data_frame):
+        data_frame.dataset = self.compile(data_frame).cache()
+        data_frame.persisted = self.take_persisted(data_frame)
+        data_frame.source = data_frame
+        data_frame.stages = ()
+
+    def to_table(self, data_frame, table_name=None, schema=None, primary_key=None, append=False,
+                 skip_unchanged=False):
+        if not table_name:
+            table_name = getattr(data_frame, 'table_name', None)
+            if not table_name:
+                raise ValueError('This DataFrame does not have a valid table name.')
+
+        dataset = self.compile(data_frame)
+        schema = schema or getattr(data_frame, 'schema', None)
+        if not schema:
+            try:
+                schema = data_frame.infer_schema(primary_key=primary_key)
+            except ValueError:
+                log.exception('Unable to infer schema for DataFrame.')
+                raise ValueError('This DataFrame does not have a valid schema.')
+
+        log.info('Saving table %s.', table_name)
+        log.debug('Table Schema = %s.', str(schema))
+
+        warehouse = self.context.warehouse
+        warehouse.create_table(table_name, schema)
+        column_names = [f.name for f in table_columns(schema)]
+        rows = dataset.map_partitions(RowConverter(column_names, list(schema.fields.keys()))).collect()
+
+        if skip_unchanged:
+            digests = format_digests(dict(PartitionDigests(bool(schema.primary_key))(rows)))
+            stored_digests = warehouse.digests(table_name)
+            changed = changed_partitions(digests, stored_digests)
+            log.info('%d of %d partitions of %s changed.', len(changed), len(digests), table_name)
+            if changed:
+                if schema.primary_key:
+                    partition_filter = PartitionFilter(changed)
+                    rows = [row for row in rows if partition_filter(row)]
+                warehouse.write(table_name, schema, rows)
+                warehouse.store_digests(table_name, dict((name, digests[name]) for name in changed))
+        else:
+            warehouse.write(table_name, schema, rows, append=append)
+            warehouse.clear_digests(table_name)
+        self.release(data_frame)
+
+        res_df = self.from_dataset(dataset)
+        res_df.table_name = table_name
+        res_df.schema = schema
+        return res_df
+
+    def from_sql_query(self, query):
+        return self.from_dataset(Dataset(self.context, Query(self.context.warehouse, query, self.context.processes)))
+
+    def from_table(self, table_name, partitions=None, partition_filter=None):
+        warehouse = self.context.warehouse
+        schema = warehouse.schema(table_name)
+        columns = '*'
+        if schema:
+            columns = ','.join([f.name for f in table_columns(schema)])
+        query = 'SELECT {columns} FROM {table_name}'.format(columns=columns, table_name=table_name)
+        parameters = ()
+
+        if partitions is not None or partition_filter is not None:
+            if not schema or not schema.primary_key:
+                raise ValueError('Table {} is not partitioned.'.format(table_name))
+            values = warehouse.partitions(table_name, schema)
+            selected = select_partitions(values, partitions, partition_filter)
+            log.info('Reading %d of %d partitions of %s.', len(selected), len(values), table_name)
+            query += ' WHERE {key_name} IN ({placeholders})'.format(
+                key_name=schema.primary_key.name,
+                placeholders=','.join(['?'] * len(selected))
+            )
+            parameters = tuple(selected)
+
+        df = self.from_dataset(Dataset(self.context, Query(warehouse, query, self.context.processes, parameters)))
+        df.table_name = table_name
+        if schema:
+            df.schema = schema
+        return df
+
+    def table_exists(self, table_name):
+        return self.context.warehouse.table_exists(table_name)
+
+    def partition_exists(self, table_name, value):
+        warehouse = self.context.warehouse
+        schema = warehouse.schema(table_name)
+        if not schema or not schema.primary_key:
+            return False
+        return partition_name(value) in set(partition_name(v) for v in warehouse.partitions(table_name, schema))
+
+    def from_url(self, url):
+        return self.from_dataset(Dataset(self.context, TextFile(url, self.context.split_size)))
+
+    def from_list(self, data):
+        return self.from_dataset(Dataset(self.context, slice_partitions(list(data), self.context.processes)))
+
+    def from_dataset(self, dataset, *parents):
+        data_frame = DataFrame()
+        data_frame.dataset = dataset
+        # Datasets cached to compute the parents are needed until the new DataFrame has been computed instead.
+        data_frame.persisted = self.take_persisted(*parents)
+        return data_frame
+
+    def take_persisted(self, *data_frames):
+        persisted = []
+        for data_frame in data_frames:
+            persisted.extend(getattr(data_frame.source, 'persisted', ()))
+            data_frame.source.persisted = []
+        return persisted
+
+    def release(self, data_frame):
+        # Called once an action has computed the DataFrame, the datasets that were cached to compute it are not needed
+        # anymore. Computing it again recomputes them.
+        for dataset in self.take_persisted(data_frame):
+            dataset.unpersist()
+
+    def run(self, step):
+        cmd, environment = self.command(step)
+        log.debug('Running local task. cmd=%s', str(cmd))
+        subprocess.check_call(cmd, env=environment)
+
+    def command(self, step):
+        python_exe = Configuration().get_nested('local', 'python', default=sys.executable)
+        return [python_exe, step.path] + step.args, None
@@ -0,0 +1,163 @@
+from collections import namedtuple
+import decimal
+import json
+import os
+import sqlite3
+
+from edx.idea.local.dataset import slice_partitions
+from edx.idea.schema import Field, Schema
+
+
+TO_SQLITE_TYPE = {
+    'string': 'TEXT',
+    'integer': 'INTEGER',
+    'float': 'REAL',
+    'double': 'REAL',
+    'binary': 'BLOB',
+    'boolean': 'BOOLEAN',
+    'date': 'DATE',
+    'timestamp': 'TIMESTAMP',
+    # The second word gives the column TEXT affinity so that values are not rounded through REAL.
+    'decimal': 'DECIMAL TEXT',
+    'tinyint': 'INTEGER',
+    'smallint': 'INTEGER',
+    'bigint': 'INTEGER'
+}
+
+sqlite3.register_adapter(decimal.Decimal, str)
+sqlite3.register_adapter(bytearray, sqlite3.Binary)
+sqlite3.register_converter('DECIMAL', decimal.Decimal)
+sqlite3.register_converter('BOOLEAN', lambda value: bool(int(value)))
+sqlite3.register_converter('BLOB', bytearray)
+
+
+def table_columns(schema):
+    # Like hive, partition columns are stored after all other columns.
+    columns = list(schema.fields_without_key())
+    if schema.primary_key:
+        columns.append(schema.primary_key)
+    return columns
+
+
+class Query(object):
+
+    def __init__(self, warehouse, query, num_partitions, parameters=()):
+        self.warehouse = warehouse
+        self.query = query
+        self.num_partitions = num_partitions
+        self.parameters = parameters
+
+    def __call__(self):
+        return slice_partitions(self.warehouse.query(self.query, self.parameters), self.num_partitions)
+
+
+class Warehouse(object):
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.connection = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES)
+        with self.connection:
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS idea_tables (table_name TEXT PRIMARY KEY, fields TEXT, primary_key TEXT)'
+            )
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS idea_partition_digests ('
+                'table_name TEXT, partition_value TEXT, digest TEXT, PRIMARY KEY (table_name, partition_value))'
+            )
+
+    def schema(self, table_name):
+        row = self.connection.execute(
+            'SELECT fields, primary_key FROM idea_tables WHERE table_name = ?', (table_name,)
+        ).fetchone()
+        if not row:
+            return None
+        fields, primary_key = row
+        return Schema(fields=[Field(name, data_type) for name, data_type in json.loads(fields)], primary_key=primary_key)
+
+    def create_table(self, table_name, schema):
+        columns = table_columns(schema)
+        existing_schema = self.schema(table_name)
+        if existing_schema:
+            if table_columns(existing_schema) != columns:
+                raise ValueError('The schema of table {0} does not match {1}.'.format(table_name, str(schema)))
+            return
+
+        with self.connection:
+            self.connection.execute('CREATE TABLE {table_name} ({column_defs})'.format(
+                table_name=table_name,
+                column_defs=','.join([f.name + ' ' + TO_SQLITE_TYPE[f.data_type] for f in columns]),
+            ))
+            if schema.primary_key:
+                self.connection.execute('CREATE INDEX {table_name}_{key_name} ON {table_name} ({key_name})'.format(
+                    table_name=table_name,
+                    key_name=schema.primary_key.name
+                ))
+            self.connection.execute('INSERT INTO idea_tables VALUES (?, ?, ?)', (
+                table_name,
+                json.dumps([list(f) for f in columns]),
+                schema.primary_key.name if schema.primary_key else None
+            ))
+
+    def write(self, table_name, schema, rows, append=False):
+        with self.connection:
+            if not append:
+                self.delete(table_name, schema, rows)
+
+            self.connection.executemany(
+                'INSERT INTO {table_name} VALUES ({placeholders})'.format(
+                    table_name=table_name,
+                    placeholders=','.join(['?'] * len(schema.fields))
+                ),
+                rows
+            )
+
+    def delete(self, table_name, schema, rows):
+        if schema.primary_key:
+            # Only the partitions that are present in the new data are overwritten.
+            self.connection.executemany(
+                'DELETE FROM {table_name} WHERE {key_name} = ?'.format(
+                    table_name=table_name,
+                    key_name=schema.primary_key.name
+                ),
+                [(key,) for key in set(row[-1] for row in rows)]
+            )
+        else:
+            self.connection.execute('DELETE FROM {table_name}'.format(table_name=table_name))
+
+    def digests(self, table_name):
+        return dict(self.connection.execute(
+            'SELECT partition_value, digest FROM idea_partition_digests WHERE table_name = ?', (table_name,)
+        ))
+
+    def store_digests(self, table_name, digests):
+        with self.connection:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO idea_partition_digests VALUES (?, ?, ?)',
+                [(table_name, name, digest) for name, digest in digests.iteritems()]
+            )
+
+    def clear_digests(self, table_name):
+        with self.connection:
+            self.connection.execute('DELETE FROM idea_partition_digests WHERE table_name = ?', (table_name,))
+
+    def table_exists(self, table_name):
+        row = self.connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ? COLLATE NOCASE", (table_name,)
+        ).fetchone()
+        return row is not None
+
+    def partitions(self, table_name, schema):
+        return [row[0] for row in self.connection.execute('SELECT DISTINCT {key_name} FROM {table_name}'.format(
+            key_name=schema.primary_key.name,
+            table_name=table_name
+        ))]
+
+    def query(self, query, parameters=()):
+        cursor = self.connection.execute(query, parameters)
+        row_type = namedtuple('Row', [description[0] for description in cursor.description], rename=True)
+        return [row_type(*row) for row in cursor]
+
+    def close(self):
+        self.connection.close()
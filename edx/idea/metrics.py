@@ -0,0 +1,202 @@
+import copy
+import logging
+import time
+
+from edx.idea.config import Configuration
+from edx.idea.plan import FILTER, MAP, PARTITION, Pipeline, Stage, compile_steps
+
+
+log = logging.getLogger(__name__)
+
+# Metrics recorded by this process, keyed by stage label. Worker processes of the local engine send theirs back to the
+# driver along with the results of each job.
+COUNTERS = {}
+
+
+def metrics_enabled():
+    return Configuration().get_nested('metrics', 'enabled', default=False)
+
+
+def merge(counters, other):
+    for label, values in other.iteritems():
+        current = counters.setdefault(label, {})
+        for name, value in values.iteritems():
+            current[name] = current.get(name, 0) + value
+    return counters
+
+
+def difference(after, before):
+    counters = {}
+    for label, values in after.iteritems():
+        previous = before.get(label, {})
+        changed = dict((name, value - previous.get(name, 0)) for name, value in values.iteritems())
+        if any(changed.itervalues()):
+            counters[label] = changed
+    return counters
+
+
+def drain():
+    counters = dict(COUNTERS)
+    COUNTERS.clear()
+    return counters
+
+
+def snapshot():
+    return copy.deepcopy(COUNTERS)
+
+
+class LocalMetricsSink(object):
+
+    def add(self, counters):
+        merge(COUNTERS, counters)
+
+
+class MetricsAccumulatorParam(object):
+
+    def zero(self, value):
+        return {}
+
+    def addInPlace(self, value, other):
+        return merge(value, other)
+
+
+def function_name(function):
+    return getattr(function, '__name__', None) or type(function).__name__
+
+
+def stage_label(stage):
+    return getattr(stage.function, 'metrics_label', None) or '{0}:{1}'.format(stage.kind, function_name(stage.function))
+
+
+class StageCounters(object):
+
+    def __init__(self):
+        self.values = {}
+
+    def add(self, label, records_in, records_out, seconds):
+        values = self.values.get(label)
+        if values is None:
+            values = self.values[label] = [0, 0, 0.0]
+        values[0] += records_in
+        values[1] += records_out
+        values[2] += seconds
+
+    def counters(self):
+        return dict(
+            (label, {'records_in': values[0], 'records_out': values[1], 'seconds': values[2]})
+            for label, values in self.values.iteritems()
+        )
+
+
+def instrument(stage, counters):
+    kind, function = stage
+    label = stage_label(stage)
+    if kind == MAP:
+        def measured_map(record):
+            start = time.time()
+            # The records are materialized so that the time spent in a generator is attributed to this stage.
+            records = list(function(record))
+            counters.add(label, 1, len(records), time.time() - start)
+            return records
+        return Stage(MAP, measured_map)
+    elif kind == FILTER:
+        def measured_filter(record):
+            start = time.time()
+            keep = function(record)
+            counters.add(label, 1, 1 if keep else 0, time.time() - start)
+            return keep
+        return Stage(FILTER, measured_filter)
+    else:
+        def measured_partition(records):
+            return measure_partition(label, function, records, counters)
+        return Stage(PARTITION, measured_partition)
+
+
+class CountingIterator(object):
+
+    def __init__(self, records):
+        self.records = iter(records)
+        self.count = 0
+        self.seconds = 0.0
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        start = time.time()
+        try:
+            record = next(self.records)
+        finally:
+            self.seconds += time.time() - start
+        self.count += 1
+        return record
+
+
+def measure_partition(label, function, records, counters):
+    # Time spent reading the input of the partition function is attributed to the stages before it.
+    records = CountingIterator(records)
+    start = time.time()
+    output = CountingIterator(function(records))
+    call_seconds = time.time() - start
+    try:
+        for record in output:
+            yield record
+    finally:
+        counters.add(label, records.count, output.count, call_seconds + output.seconds - records.seconds)
+
+
+class MeasuredPipeline(Pipeline):
+
+    def __init__(self, stages, sink):
+        super(MeasuredPipeline, self).__init__(stages)
+        self.sink = sink
+
+    def __call__(self, records):
+        # Counters are collected for each partition and added to the sink once the partition has been consumed.
+        counters = StageCounters()
+        for step in compile_steps([instrument(stage, counters) for stage in self.stages]):
+            records = step(records)
+        try:
+            for record in records:
+                yield record
+        finally:
+            # Partitions that are not read completely are closed first, so that every stage records its counters.
+            if hasattr(records, 'close'):
+                records.close()
+            self.sink.add(counters.counters())
+
+
+class MeasuredEach(object):
+
+    def __init__(self, each_function, sink):
+        self.each_function = each_function
+        self.sink = sink
+
+    def __call__(self, records):
+        counters = StageCounters()
+        label = 'each:' + function_name(self.each_function)
+        try:
+            for record in records:
+                start = time.time()
+                self.each_function(record)
+                counters.add(label, 1, 0, time.time() - start)
+        finally:
+            self.sink.add(counters.counters())
+
+
+def format_metrics(counters):
+    lines = ['{0:<40} {1:>12} {2:>12} {3:>10} {4:>14}'.format(
+        'Stage', 'Records In', 'Records Out', 'Seconds', 'Payload Bytes'
+    )]
+    for label, values in sorted(counters.iteritems()):
+        lines.append('{0:<40} {1:>12} {2:>12} {3:>10.3f} {4:>14}'.format(
+            label, values.get('records_in', 0), values.get('records_out', 0), values.get('seconds', 0),
+            values.get('payload_bytes', '')
+        ))
+    return '\n'.join(lines)
+
+
+def log_metrics(snapshot_function):
+    counters = snapshot_function()
+    if counters:
+        log.info('Stage metrics:\n%s', format_metrics(counters))
@@ -0,0 +1,19 @@
+
+
+def partition_name(value):
+    return u'' if value is None else unicode(value)
+
+
+def select_partitions(values, partitions=None, partition_filter=None):
+    # Partitions are matched by name, the string representation of the partition value that is also used for the
+    # partition directory, and partition_filter is called with that name.
+    names = None if partitions is None else set(partition_name(value) for value in partitions)
+    selected = []
+    for value in values:
+        name = partition_name(value)
+        if names is not None and name not in names:
+            continue
+        if partition_filter is not None and not partition_filter(name):
+            continue
+        selected.append(value)
+    return selected
@@ -0,0 +1,81 @@
+import logging
+import pickle
+import types
+
+try:
+    import cloudpickle
+except ImportError:
+    cloudpickle = None
+
+from edx.idea.common.singleton import Singleton
+from edx.idea.config import Configuration
+from edx.idea.fingerprint import referenced_names
+from edx.idea.metrics import function_name
+
+
+log = logging.getLogger(__name__)
+
+
+class PayloadSettings(object):
+    __metaclass__ = Singleton
+
+    def __init__(self):
+        config = Configuration()
+        self.inspect = config.get_nested('payload', 'inspect', default=True)
+        self.warn_size = config.get_nested('payload', 'warn_size', default=1024 * 1024)
+        self.max_size = config.get_nested('payload', 'max_size', default=None)
+
+
+def serialized_size(value):
+    try:
+        return len(cloudpickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return None
+
+
+def captured_values(function):
+    # The values that are serialized along with a function: the variables of its closure and the globals it refers to,
+    # or the attributes of a callable object.
+    if isinstance(function, types.MethodType):
+        return captured_values(function.__self__)
+    if isinstance(function, types.FunctionType):
+        values = {}
+        for name, cell in zip(function.func_code.co_freevars, function.func_closure or ()):
+            values[name] = cell.cell_contents
+        for name in referenced_names(function.func_code):
+            value = function.func_globals.get(name)
+            if name in function.func_globals and not isinstance(value, types.ModuleType):
+                values[name] = value
+        return values
+    return dict(getattr(function, '__dict__', {}))
+
+
+def largest_captures(function, count=3):
+    sizes = []
+    for name, value in captured_values(function).iteritems():
+        size = serialized_size(value)
+        if size is not None:
+            sizes.append((size, name))
+    sizes.sort(reverse=True)
+    return [(name, size) for size, name in sizes[:count]]
+
+
+def inspect_payload(label, function):
+    settings = PayloadSettings()
+    if not settings.inspect or cloudpickle is None:
+        return None
+
+    size = serialized_size(function)
+    if size is None:
+        return None
+
+    too_large = settings.max_size is not None and size > settings.max_size
+    if too_large or size >= settings.warn_size:
+        captures = ', '.join('{0} ({1} bytes)'.format(name, size) for name, size in largest_captures(function))
+        message = (
+            'Function {0} of stage {1} is {2} bytes when serialized, the largest captured values are: {3}.'
+        ).format(function_name(function), label, size, captures or 'none')
+        if too_large:
+            raise ValueError(message)
+        log.warning(message)
+    return size
@@ -0,0 +1,80 @@
+from collections import namedtuple
+
+
+MAP = 'map'
+FILTER = 'filter'
+PARTITION = 'partition'
+
+Stage = namedtuple('Stage', ['kind', 'function'])
+
+
+class Pipeline(object):
+
+    def __init__(self, stages):
+        self.stages = tuple(stages)
+        self.steps = compile_steps(self.stages)
+
+    def __call__(self, records):
+        for step in self.steps:
+            records = step(records)
+        return records
+
+    def __repr__(self):
+        return 'Pipeline(stages={0})'.format(repr(self.stages))
+
+
+class FusedLoop(object):
+
+    def __init__(self, stages):
+        self.segments = segment(stages)
+
+    def __call__(self, records):
+        # All stages are fused into a single loop over the partition. Each level of the stack holds the records yielded
+        # by a map function that have not yet been pushed through the remaining stages.
+        segments = self.segments
+        stack = [iter(records)]
+        while stack:
+            filters, map_function = segments[len(stack) - 1]
+            for record in stack[-1]:
+                for filter_function in filters:
+                    if not filter_function(record):
+                        break
+                else:
+                    if map_function is None:
+                        yield record
+                    else:
+                        stack.append(iter(map_function(record)))
+                        break
+            else:
+                stack.pop()
+
+
+def compile_steps(stages):
+    steps = []
+    record_stages = []
+    for stage in stages:
+        if stage.kind == PARTITION:
+            if record_stages:
+                steps.append(FusedLoop(record_stages))
+                record_stages = []
+            steps.append(stage.function)
+        else:
+            record_stages.append(stage)
+    if record_stages:
+        steps.append(FusedLoop(record_stages))
+    return steps
+
+
+def segment(stages):
+    segments = []
+    filters = []
+    for kind, function in stages:
+        if kind == FILTER:
+            filters.append(function)
+        elif kind == MAP:
+            segments.append((tuple(filters), function))
+            filters = []
+        else:
+            raise ValueError('Unknown stage type {}.'.format(kind))
+    segments.append((tuple(filters), None))
+    return segments
@@ -1,8 +1,12 @@
-
+import hashlib
+import importlib
+import json
 import logging
+import os
+import sys
+import tempfile
 
-from stevedore import driver
-
+from edx.idea.common.files import private_directory, user_directory
 from edx.idea.common.singleton import Singleton
 from edx.idea.config import Configuration
 
@@ -10,19 +14,140 @@ from edx.idea.config import Configuration
 log = logging.getLogger(__name__)
 
 
+ENGINE_NAMESPACE = 'edx.idea.engine'
+TASK_NAMESPACE = 'edx.idea.task'
+METADATA_SUFFIXES = ('.dist-info', '.egg-info', '.egg', '.egg-link', '.pth')
+
+
+def configure_logging():
+    if logging.root.handlers:
+        return
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s %(levelname)s %(process)d [%(name)s] %(filename)s:%(lineno)d - %(message)s'
+    )
+    log.info('Logging configured.')
+
+
+def metadata_stamp(path):
+    # The entry points of a distribution are stored in its metadata directory, installing, upgrading or removing a
+    # distribution changes the modification time of that file or the listing of the directory that contains it.
+    for entry_points_path in ('entry_points.txt', os.path.join('EGG-INFO', 'entry_points.txt')):
+        try:
+            return os.stat(os.path.join(path, entry_points_path)).st_mtime
+        except OSError:
+            pass
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def is_trusted(path):
+    # The registry names the modules that are imported to load plugins, so it is only used if no other user could
+    # have written it.
+    try:
+        status = os.stat(path)
+    except OSError:
+        return False
+    if status.st_uid != os.getuid() or status.st_mode & 0o022:
+        log.warning('Ignoring the plugin registry %s, other users may have written it.', path)
+        return False
+    return True
+
+
+def distributions_signature():
+    digest = hashlib.sha1()
+    for path_entry in sys.path:
+        directory = path_entry or os.curdir
+        digest.update(os.path.abspath(directory) + '\0')
+        try:
+            names = sorted(os.listdir(directory))
+        except OSError:
+            continue
+        for name in names:
+            if name.endswith(METADATA_SUFFIXES):
+                digest.update('{0}\0{1}\0'.format(name, metadata_stamp(os.path.join(directory, name))))
+    return digest.hexdigest()
+
+
+class PluginRegistry(object):
+    """
+    The entry points of the installed distributions, which are stored in a file so that they don't need to be scanned
+    every time a process starts. The file is rescanned when the set of installed distributions changes.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or Configuration().get_nested('plugins', 'cache', default=None)
+        if not self.path:
+            try:
+                self.path = os.path.join(private_directory(user_directory()), 'plugins.json')
+            except (OSError, ValueError):
+                log.warning('Unable to use a private directory for the plugin registry.', exc_info=True)
+        self.signature = distributions_signature()
+        self.entry_points = None
+        self.scanned = False
+        if self.path and is_trusted(self.path):
+            try:
+                with open(self.path, 'r') as registry_file:
+                    struct = json.load(registry_file)
+                if struct.get('signature') == self.signature:
+                    self.entry_points = struct['entry_points']
+            except (IOError, ValueError, KeyError):
+                pass
+        if self.entry_points is None:
+            self.scan()
+
+    def scan(self):
+        import pkg_resources
+
+        log.debug('Scanning installed distributions for plugins.')
+        self.entry_points = {}
+        self.scanned = True
+        for namespace in (ENGINE_NAMESPACE, TASK_NAMESPACE):
+            self.entry_points[namespace] = dict(
+                (entry_point.name, '{0}:{1}'.format(entry_point.module_name, '.'.join(entry_point.attrs)))
+                for entry_point in pkg_resources.iter_entry_points(namespace)
+            )
+        self.save()
+
+    def save(self):
+        if not self.path:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            if not os.path.exists(directory):
+                os.makedirs(directory, 0o700)
+            handle, temp_path = tempfile.mkstemp(dir=directory, prefix='.plugins', suffix='.tmp')
+            with os.fdopen(handle, 'w') as registry_file:
+                json.dump({'signature': self.signature, 'entry_points': self.entry_points}, registry_file)
+            os.rename(temp_path, self.path)
+        except (IOError, OSError):
+            log.warning('Unable to write the plugin registry to %s.', self.path)
+
+    def names(self, namespace):
+        return sorted(self.entry_points.get(namespace, {}))
+
+    def load(self, namespace, name):
+        target = self.entry_points.get(namespace, {}).get(name)
+        if target is None and not self.scanned:
+            # Distributions installed in development mode can change their entry points without being reinstalled.
+            self.scan()
+            target = self.entry_points.get(namespace, {}).get(name)
+        if target is None:
+            raise RuntimeError('No {0!r} plugin found in namespace {1!r}.'.format(name, namespace))
+        module_name, _, attrs = target.partition(':')
+        plugin = importlib.import_module(module_name)
+        for attr in attrs.split('.'):
+            plugin = getattr(plugin, attr)
+        return plugin
+
+
 class PluginManager(object):
     __metaclass__ = Singleton
 
     def __init__(self):
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s %(levelname)s %(process)d [%(name)s] %(filename)s:%(lineno)d - %(message)s'
-        )
-        log.info('Logging configured.')
+        configure_logging()
         config = Configuration()
-        mgr = driver.DriverManager(
-            namespace='edx.idea.engine',
-            name=config.get('engine', 'spark'),
-            invoke_on_load=True,
-        )
-        self.engine = mgr.driver
+        self.registry = PluginRegistry()
+        self.engine = self.registry.load(ENGINE_NAMESPACE, config.get('engine', 'spark'))()
@@ -0,0 +1,149 @@
+import json
+import time
+
+
+class Attempt(object):
+
+    def __init__(self, key, queued, submitted):
+        self.key = key
+        self.queued = queued
+        self.submitted = submitted
+        self.started = None
+        self.finished = None
+        self.error = None
+
+    @property
+    def queue_time(self):
+        return self.submitted - self.queued
+
+    @property
+    def start_latency(self):
+        if self.started is None:
+            return None
+        return self.started - self.submitted
+
+    @property
+    def run_time(self):
+        # Without a start time, the run time includes the start latency.
+        return self.finished - (self.submitted if self.started is None else self.started)
+
+
+class Profiler(object):
+
+    def __init__(self):
+        self.started = time.time()
+        self.finished = None
+        self.queued = {}
+        self.attempts = {}
+        self.skipped = set()
+
+    def task_queued(self, name):
+        self.queued[name] = time.time()
+
+    def task_skipped(self, name):
+        self.skipped.add(name)
+
+    def attempt_submitted(self, key):
+        name, _ = key
+        self.attempts[key] = Attempt(key, self.queued.get(name, self.started), time.time())
+
+    def attempt_finished(self, key, error, started, finished):
+        attempt = self.attempts[key]
+        attempt.error = error
+        # Timestamps reported by the backend are clamped, a worker may observe time slightly before the submission.
+        # Backends that cannot tell when a task started report None.
+        attempt.started = max(started, attempt.submitted) if started is not None else None
+        attempt.finished = max(finished, attempt.started or attempt.submitted)
+
+    def workflow_finished(self):
+        self.finished = time.time()
+
+    def completed_attempt(self, name):
+        attempts = [
+            attempt for (attempt_name, _), attempt in self.attempts.iteritems()
+            if attempt_name == name and attempt.finished is not None and not attempt.error
+        ]
+        return min(attempts, key=lambda attempt: attempt.finished) if attempts else None
+
+    def critical_path(self, dependencies):
+        # Starting from the task that completed last, follow the dependency that completed last before it. This is the
+        # chain of tasks that determined the duration of the run.
+        completed = dict(
+            (name, attempt) for name, attempt in ((name, self.completed_attempt(name)) for name in dependencies)
+            if attempt is not None
+        )
+        path = []
+        candidates = completed.keys()
+        while candidates:
+            name = max(candidates, key=lambda n: completed[n].finished)
+            path.append((name, completed[name]))
+            candidates = [n for n in dependencies[name] if n in completed]
+        path.reverse()
+        return path
+
+    def phase_times(self, workflow):
+        times = []
+        for phase in workflow.phases:
+            names = set(task.name for task in phase.tasks)
+            attempts = [
+                attempt for (name, _), attempt in self.attempts.iteritems()
+                if attempt.finished is not None and name in names
+            ]
+            if attempts:
+                times.append((phase.name, min(a.submitted for a in attempts), max(a.finished for a in attempts)))
+        return times
+
+    def summary(self, workflow, dependencies):
+        lines = ['Profile of {0}, total {1:.1f}s.'.format(str(workflow), (self.finished or time.time()) - self.started)]
+        for name, started, finished in self.phase_times(workflow):
+            lines.append('  Phase {0}: {1:.1f}s.'.format(name, finished - started))
+        lines.append('  Critical path:')
+        for name, attempt in self.critical_path(dependencies):
+            start_latency = attempt.start_latency
+            lines.append('    {0}: queued {1:.1f}s, start latency {2}, ran {3:.1f}s.'.format(
+                name, attempt.queue_time,
+                'n/a' if start_latency is None else '{0:.1f}s'.format(start_latency),
+                attempt.run_time
+            ))
+        if self.skipped:
+            lines.append('  Skipped {0} up to date tasks.'.format(len(self.skipped)))
+        return '\n'.join(lines)
+
+    def trace(self, workflow):
+        # The chrome trace event format, see https://github.com/catapult-project/catapult/tree/master/tracing
+        def microseconds(timestamp):
+            return int((timestamp - self.started) * 1000000)
+
+        events = []
+        for name, started, finished in self.phase_times(workflow):
+            events.append({
+                'name': name, 'cat': 'phase', 'ph': 'X', 'pid': 0, 'tid': 0,
+                'ts': microseconds(started), 'dur': microseconds(finished) - microseconds(started),
+            })
+
+        # Every attempt is drawn in the first lane that is free when it is submitted.
+        lanes = []
+        finished_attempts = [a for a in self.attempts.itervalues() if a.finished is not None]
+        for attempt in sorted(finished_attempts, key=lambda a: a.submitted):
+            lane = next((i for i, free in enumerate(lanes) if free <= attempt.submitted), len(lanes))
+            if lane == len(lanes):
+                lanes.append(0)
+            lanes[lane] = attempt.finished
+            name, number = attempt.key
+            events.append({
+                'name': name, 'cat': 'task', 'ph': 'X', 'pid': 1, 'tid': lane,
+                'ts': microseconds(attempt.submitted),
+                'dur': microseconds(attempt.finished) - microseconds(attempt.submitted),
+                'args': {
+                    'attempt': number,
+                    'queue_time': attempt.queue_time,
+                    'start_latency': attempt.start_latency,
+                    'run_time': attempt.run_time,
+                    'failed': attempt.error is not None,
+                },
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write_trace(self, workflow, path):
+        with open(path, 'w') as trace_file:
+            json.dump(self.trace(workflow), trace_file)
@@ -0,0 +1,279 @@
+import logging
+import os
+import Queue
+import select
+import subprocess
+import sys
+import time
+import traceback
+
+from edx.idea.partition import partition_name
+from edx.idea.plugin import PluginManager
+from edx.idea.state import target_table
+
+
+log = logging.getLogger(__name__)
+
+
+class TaskFailed(Exception):
+    pass
+
+
+def target_key(target):
+    table_name = target_table(target)
+    if table_name:
+        partition = partition_name(target['partition']) if 'partition' in target else None
+        return ('table', table_name.lower(), partition)
+    return ('url', target, None)
+
+
+def target_producers(producers, key):
+    kind, name, partition = key
+    if kind != 'table':
+        return producers.get(key, set())
+    if partition is None:
+        # Reading a whole table depends on every task that writes to any of its partitions.
+        return set().union(*[names for (k, n, _), names in producers.iteritems() if (k, n) == (kind, name)])
+    return producers.get(key, set()) | producers.get((kind, name, None), set())
+
+
+def task_dependencies(workflow):
+    tasks = workflow.tasks
+    names = set()
+    producers = {}
+    for task in tasks:
+        if task.name in names:
+            raise ValueError('Duplicate task name {0}.'.format(task.name))
+        names.add(task.name)
+        for target in task.outputs:
+            producers.setdefault(target_key(target), set()).add(task.name)
+
+    # Tasks that do not declare their dependencies depend on every task in the previous phase, which preserves the
+    # meaning of workflows that are only divided into phases. Reading the output of another task always depends on it.
+    dependencies = {}
+    previous_phase = []
+    for phase in workflow.phases:
+        for task in phase.tasks:
+            if task.depends_on is None:
+                depends_on = set(t.name for t in previous_phase)
+            else:
+                depends_on = set(task.depends_on)
+                unknown = depends_on - names
+                if unknown:
+                    raise ValueError('{0} depends on unknown tasks {1}.'.format(str(task), ', '.join(sorted(unknown))))
+            for target in task.inputs:
+                depends_on.update(target_producers(producers, target_key(target)) - set([task.name]))
+            dependencies[task.name] = depends_on
+        previous_phase = phase.tasks
+
+    check_acyclic(dependencies)
+    return dependencies
+
+
+def check_acyclic(dependencies):
+    remaining = dict((name, set(depends_on)) for name, depends_on in dependencies.iteritems())
+    while remaining:
+        ready = [name for name, depends_on in remaining.iteritems() if not depends_on]
+        if not ready:
+            raise ValueError('The dependencies of tasks {0} form a cycle.'.format(', '.join(sorted(remaining))))
+        for name in ready:
+            del remaining[name]
+        for depends_on in remaining.itervalues():
+            depends_on.difference_update(ready)
+
+
+class ResourcePool(object):
+
+    def __init__(self, capacities):
+        # Resources that have no capacity are not limited.
+        self.capacities = dict(capacities)
+        self.used = dict((name, 0) for name in self.capacities)
+
+    def validate(self, task):
+        for name, amount in task.resources.iteritems():
+            if amount > self.capacities.get(name, amount):
+                raise ValueError('{0} requires {1} {2}, but only {3} are available.'.format(
+                    str(task), amount, name, self.capacities[name]
+                ))
+
+    def fits(self, requirements):
+        return all(
+            self.used[name] + amount <= self.capacities[name]
+            for name, amount in requirements.iteritems() if name in self.capacities
+        )
+
+    def acquire(self, requirements):
+        for name, amount in requirements.iteritems():
+            if name in self.used:
+                self.used[name] += amount
+
+    def release(self, requirements):
+        for name, amount in requirements.iteritems():
+            if name in self.used:
+                self.used[name] -= amount
+
+
+def run_task(key, task):
+    started = time.time()
+    engine = PluginManager().engine
+    log.info('Executing %s.', str(task))
+    try:
+        engine.run(task)
+    except Exception:
+        log.exception('%s failed.', str(task))
+        return key, traceback.format_exc(), started, time.time()
+    log.info('%s complete.', str(task))
+    return key, None, started, time.time()
+
+
+class PoolBackend(object):
+
+    def __init__(self, processes=None):
+        from multiprocessing import Pool
+
+        # The engine is loaded before the workers are forked, so that they inherit it instead of each loading it.
+        PluginManager()
+        self.pool = Pool(processes)
+        self.results = Queue.Queue()
+
+    def submit(self, key, task):
+        self.pool.apply_async(run_task, (key, task), callback=self.results.put)
+
+    def wait(self, timeout=None):
+        # Waiting in short intervals keeps the main thread responsive to KeyboardInterrupt.
+        deadline = time.time() + timeout if timeout is not None else None
+        while True:
+            interval = min(1, deadline - time.time()) if deadline is not None else 1
+            if interval <= 0:
+                return None
+            try:
+                return self.results.get(timeout=interval)
+            except Queue.Empty:
+                pass
+
+    def cancel(self, key, wait=False):
+        # Tasks that are running in the pool cannot be interrupted.
+        return False
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+    def terminate(self):
+        self.pool.terminate()
+        self.pool.join()
+
+
+class RunningProcess(object):
+
+    def __init__(self, key, task, process, log_file=None):
+        self.key = key
+        self.task = task
+        self.process = process
+        # Starting the process returns long before the command is running, spark-submit has to start a JVM first. The
+        # task is considered started when it writes its first output, which is not observed if it goes to a log file.
+        self.started = None
+        self.log_file = log_file
+        self.buffers = {}
+        self.streams = {}
+        if process.stdout:
+            self.streams[process.stdout.fileno()] = (process.stdout, sys.stdout)
+        if process.stderr:
+            self.streams[process.stderr.fileno()] = (process.stderr, sys.stderr)
+
+    def read(self, fd):
+        _, output = self.streams[fd]
+        data = os.read(fd, 65536)
+        if not data:
+            self.write(output, self.buffers.pop(fd, ''))
+            del self.streams[fd]
+            return
+        if self.started is None:
+            self.started = time.time()
+        lines = (self.buffers.get(fd, '') + data).split('\n')
+        self.buffers[fd] = lines.pop()
+        for line in lines:
+            self.write(output, line)
+
+    def write(self, output, line):
+        if line:
+            output.write('[{0}] {1}\n'.format(self.task.name, line))
+            output.flush()
+
+    def result(self):
+        if self.log_file:
+            self.log_file.close()
+        returncode = self.process.returncode
+        if returncode == 0:
+            log.info('%s complete.', str(self.task))
+            return self.key, None, self.started, time.time()
+        error = 'Command {0} exited with status {1}.'.format(' '.join(self.process.args), returncode)
+        if self.log_file:
+            error += ' The output was written to {0}.'.format(self.log_file.name)
+        return self.key, error, self.started, time.time()
+
+
+class ProcessBackend(object):
+
+    def __init__(self, log_directory=None):
+        self.log_directory = log_directory
+        if log_directory and not os.path.exists(log_directory):
+            os.makedirs(log_directory)
+        self.running = {}
+
+    def submit(self, key, task):
+        # Task processes are managed directly by a single event loop in this process, their output is either prefixed
+        # with the name of the task or written to a log file per task.
+        cmd, environment = PluginManager().engine.command(task)
+        log.info('Executing %s.', str(task))
+        if self.log_directory:
+            name, attempt = key
+            log_file = open(os.path.join(self.log_directory, '{0}.{1}.log'.format(name, attempt)), 'w')
+            process = subprocess.Popen(cmd, env=environment, stdout=log_file, stderr=subprocess.STDOUT)
+        else:
+            log_file = None
+            process = subprocess.Popen(cmd, env=environment, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        process.args = cmd
+        self.running[key] = RunningProcess(key, task, process, log_file)
+
+    def wait(self, timeout=None):
+        deadline = time.time() + timeout if timeout is not None else None
+        while True:
+            for key, running in self.running.items():
+                # A process is complete once it has exited and all of its output has been read.
+                if not running.streams and running.process.poll() is not None:
+                    del self.running[key]
+                    return running.result()
+
+            interval = min(0.1, deadline - time.time()) if deadline is not None else 0.1
+            if interval <= 0:
+                return None
+            streams = dict((fd, running) for running in self.running.itervalues() for fd in running.streams)
+            if streams:
+                readable, _, _ = select.select(streams.keys(), [], [], interval)
+                for fd in readable:
+                    streams[fd].read(fd)
+            else:
+                time.sleep(interval)
+
+    def cancel(self, key, wait=False):
+        running = self.running.get(key)
+        if running is None or running.process.poll() is not None:
+            return False
+        log.info('Cancelling %s.', str(running.task))
+        running.process.terminate()
+        if wait:
+            running.process.wait()
+        return True
+
+    def close(self):
+        for key in self.running.keys():
+            self.cancel(key)
+        for running in self.running.values():
+            running.process.wait()
+            if running.log_file:
+                running.log_file.close()
+        self.running = {}
+
+    def terminate(self):
+        self.close()
@@ -1,9 +1,24 @@
 from collections import namedtuple
 from collections import OrderedDict
+import datetime
+import decimal
 
 
 Field = namedtuple('Field', ['name', 'data_type'])
 
+# Order matters, bool is a subclass of int and datetime is a subclass of date.
+FROM_PYTHON_TYPE = [
+    (bool, 'boolean'),
+    (int, 'integer'),
+    (long, 'bigint'),
+    (float, 'double'),
+    (basestring, 'string'),
+    (bytearray, 'binary'),
+    (decimal.Decimal, 'decimal'),
+    (datetime.datetime, 'timestamp'),
+    (datetime.date, 'date'),
+]
+
 
 class Schema(object):
 
@@ -18,8 +33,101 @@ class Schema(object):
             if not self.primary_key or field.name != self.primary_key.name:
                 yield field
 
+    def __eq__(self, other):
+        return (
+            isinstance(other, Schema) and
+            list(self.fields_without_key()) == list(other.fields_without_key()) and
+            self.primary_key == other.primary_key
+        )
+
+    def __ne__(self, other):
+        return not self == other
+
     def __repr__(self):
         return 'Schema(fields={0}, primary_key={1})'.format(
             repr([f for _, f in self.fields.items()]),
             repr(None) if not self.primary_key else repr(self.primary_key.name)
         )
+
+
+def record_items(record):
+    if hasattr(record, '_fields'):
+        return zip(record._fields, tuple(record))
+    elif isinstance(record, dict):
+        return record.items()
+    elif isinstance(record, (tuple, list)) and all(isinstance(item, (tuple, list)) and len(item) == 2 for item in record):
+        return [tuple(item) for item in record]
+    else:
+        raise ValueError('Unable to determine the columns of record {0!r}.'.format(record))
+
+
+def python_data_type(value):
+    for python_type, data_type in FROM_PYTHON_TYPE:
+        if isinstance(value, python_type):
+            return data_type
+    raise ValueError('Unable to determine the data type of value {0!r}.'.format(value))
+
+
+def widen_data_type(data_type, other_data_type):
+    if data_type == other_data_type:
+        return data_type
+    types = set([data_type, other_data_type])
+    if types <= set(['integer', 'bigint']):
+        return 'bigint'
+    if types <= set(['integer', 'bigint', 'double']):
+        return 'double'
+    raise ValueError('Incompatible data types {0} and {1}.'.format(data_type, other_data_type))
+
+
+def infer_fields(records):
+    # The column names are taken from the first record, the sample is only used to find a non-null value for each
+    # column and to widen numeric types.
+    if not records:
+        raise ValueError('Unable to infer a schema without any records.')
+
+    names = [name for name, _ in record_items(records[0])]
+    data_types = dict((name, None) for name in names)
+    for record in records:
+        for name, value in record_items(record):
+            if value is None or name not in data_types:
+                continue
+            data_type = python_data_type(value)
+            if data_types[name] is not None:
+                data_type = widen_data_type(data_types[name], data_type)
+            data_types[name] = data_type
+
+    return [Field(name, data_types[name] or 'string') for name in names]
+
+
+def infer_schema(records, primary_key=None):
+    return Schema(fields=infer_fields(records), primary_key=primary_key)
+
+
+class RowConverter(object):
+
+    def __init__(self, column_names, field_names=None):
+        self.column_names = tuple(column_names)
+        # Plain tuples and lists hold their values in the order of the fields of the schema.
+        self.field_names = tuple(field_names) if field_names is not None else self.column_names
+
+    def __call__(self, records):
+        for record in records:
+            if getattr(record, '_fields', None) == self.column_names:
+                yield tuple(record)
+            elif self.is_positional(record):
+                if self.field_names == self.column_names:
+                    yield tuple(record)
+                else:
+                    values = dict(zip(self.field_names, record))
+                    yield tuple(values.get(name) for name in self.column_names)
+            else:
+                values = dict(record_items(record))
+                yield tuple(values.get(name) for name in self.column_names)
+
+    def is_positional(self, record):
+        if hasattr(record, '_fields') or not isinstance(record, (tuple, list)):
+            return False
+        # A record of (column_name, value) pairs names every one of its columns.
+        return not all(
+            isinstance(item, (tuple, list)) and len(item) == 2 and item[0] in self.field_names for item in record
+        )
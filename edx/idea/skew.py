@@ -0,0 +1,90 @@
+from collections import Counter
+import logging
+
+from edx.idea.config import Configuration
+
+
+log = logging.getLogger(__name__)
+
+
+def mergeable(merge_function):
+    # Declares that a reduce function can be run independently over several subsets of the values for a key. The
+    # records it yields for each subset are later passed to merge_function(key, partial_records) to produce the final
+    # records for that key.
+    def decorator(reduce_function):
+        reduce_function.merge_function = merge_function
+        return reduce_function
+    return decorator
+
+
+class SkewSettings(object):
+
+    def __init__(self):
+        config = Configuration()
+        self.sample_fraction = config.get_nested('skew', 'sample_fraction', default=0.01)
+        self.threshold = config.get_nested('skew', 'threshold', default=0.05)
+        self.salts = config.get_nested('skew', 'salts', default=16)
+
+
+class SampleKeys(object):
+
+    def __init__(self, fraction):
+        self.fraction = fraction
+
+    def __call__(self, pairs):
+        # Every n-th record is sampled, which does not depend on the state of a random number generator that forked
+        # worker processes would share.
+        step = max(1, int(round(1 / self.fraction)))
+        for index, (key, _) in enumerate(pairs):
+            if index % step == 0:
+                yield key
+
+
+def detect_hot_keys(sampled_keys, threshold):
+    counts = Counter(sampled_keys)
+    total = sum(counts.values())
+    return set(key for key, count in counts.iteritems() if total and float(count) / total >= threshold)
+
+
+class SaltKeys(object):
+
+    def __init__(self, hot_keys, salts):
+        self.hot_keys = hot_keys
+        self.salts = salts
+
+    def __call__(self, pairs):
+        # The records of a hot key are dealt to the salts in turn. Map functions may be executed again, for example when
+        # spark recomputes a lost partition, and must then send every record to the same reducer as before, so the salt
+        # only depends on the position of the record in the partition.
+        counters = Counter()
+        for key, value in pairs:
+            if key in self.hot_keys:
+                yield ((key, counters[key] % self.salts), value)
+                counters[key] += 1
+            else:
+                yield ((key, None), value)
+
+
+def salted_reducer_driver(reduce_function):
+    def reducer(t):
+        (key, salt), values = t
+        for item in reduce_function(key, values):
+            yield (salt is not None, key, item)
+    reducer.metrics_label = 'reduce:' + getattr(reduce_function, '__name__', type(reduce_function).__name__)
+    return reducer
+
+
+def is_partial(t):
+    return t[0]
+
+
+def is_final(t):
+    return not t[0]
+
+
+def to_partial(t):
+    yield (t[1], t[2])
+
+
+def to_final(t):
+    yield t[2]
@@ -1,36 +1,64 @@
+import atexit
+import copy
 import logging
+from multiprocessing.pool import ThreadPool
 import subprocess
 import sys
+import urllib
 
-try:
-    from pyspark.sql import StructType, StructField, StringType, IntegerType, FloatType, DoubleType, BinaryType, BooleanType, DateType, TimestampType, DecimalType, ByteType, ShortType, LongType
-
-    FROM_RDD_TYPE = {
-        StringType: 'string',
-        IntegerType: 'integer',
-        FloatType: 'float',
-        DoubleType: 'double',
-        BinaryType: 'binary',
-        BooleanType: 'boolean',
-        DateType: 'date',
-        TimestampType: 'timestamp',
-        DecimalType: 'decimal',
-        ByteType: 'tinyint',
-        ShortType: 'smallint',
-        LongType: 'bigint',
-    }
-    TO_RDD_TYPE = dict((v, k) for k, v in FROM_RDD_TYPE.iteritems())
-except ImportError:
-    pass
-
+from edx.idea.catalog import Catalog
 from edx.idea.common.identifier import generate_uuid
+from edx.idea.common.prefetch import iterate_partitions
+from edx.idea.common.reducer import combined_reducer_driver, reducer_driver
 from edx.idea.config import Configuration
 from edx.idea.data_frame import DataFrame
-from edx.idea.schema import Field, Schema
+from edx.idea.digest import PartitionDigests, changed_partitions, combine_digests, format_digests
+from edx.idea.join import LEFT, RIGHT, BroadcastJoin, KeyBy, broadcast_side, build_table, cogroup_joiner
+from edx.idea.metrics import MeasuredEach, MeasuredPipeline, MetricsAccumulatorParam, log_metrics, metrics_enabled
+from edx.idea.partition import partition_name, select_partitions
+from edx.idea.plan import FILTER, MAP, PARTITION, Pipeline, Stage
+from edx.idea.schema import Field, RowConverter, Schema
+from edx.idea.skew import (
+    SaltKeys, SampleKeys, SkewSettings, detect_hot_keys, is_final, is_partial, salted_reducer_driver, to_final,
+    to_partial
+)
 from edx.idea.spark.context import Context
+from edx.idea.spark.server import submit
 
 
 log = logging.getLogger(__name__)
+
+
+# Spark SQL types are only imported when a schema is converted, tasks can be submitted without importing pyspark.
+RDD_TYPES = {}
+
+
+def rdd_types():
+    if not RDD_TYPES:
+        from pyspark.sql import (
+            StringType, IntegerType, FloatType, DoubleType, BinaryType, BooleanType, DateType, TimestampType,
+            DecimalType, ByteType, ShortType, LongType
+        )
+
+        from_rdd_type = {
+            StringType: 'string',
+            IntegerType: 'integer',
+            FloatType: 'float',
+            DoubleType: 'double',
+            BinaryType: 'binary',
+            BooleanType: 'boolean',
+            DateType: 'date',
+            TimestampType: 'timestamp',
+            DecimalType: 'decimal',
+            ByteType: 'tinyint',
+            ShortType: 'smallint',
+            LongType: 'bigint',
+        }
+        RDD_TYPES['from'] = from_rdd_type
+        RDD_TYPES['to'] = dict((v, k) for k, v in from_rdd_type.iteritems())
+    return RDD_TYPES
+
+
 TO_HIVE_TYPE = {
     'string': 'STRING',
     'integer': 'INT',
@@ -46,20 +74,11 @@ TO_HIVE_TYPE = {
     'bigint': 'BIGINT'
 }
 
+DIGEST_TABLE = 'idea_partition_digests'
 
-def reducer_driver(reduce_function):
-    def reducer(t):
-        key, values = t
-        for item in reduce_function(key, values):
-            yield item
-    return reducer
 
-
-def convert_namedtuple(record):
-    if hasattr(record, '_fields'):
-        return tuple(zip(record._fields, tuple(record)))
-    else:
-        return record
+def hive_literal(value):
+    return "'" + value.replace('\\', '\\\\').replace("'", "\\'") + "'"
 
 
 class SparkEngine(object):
@@ -70,72 +89,193 @@ class SparkEngine(object):
             self._context = Context()
         return self._context
 
-    def map(self, data_frame, map_function):
-        return self.from_rdd(data_frame.rdd.flatMap(map_function))
+    @property
+    def catalog(self):
+        if not hasattr(self, '_catalog'):
+            self._catalog = Catalog(ttl=Configuration().get_nested('spark', 'catalog', 'ttl', default=60))
+        return self._catalog
 
-    def map_reduce(self, data_frame, map_function, reduce_function):
-        return self.from_rdd(data_frame.rdd.flatMap(map_function).groupByKey().flatMap(reducer_driver(reduce_function)))
+    @property
+    def metrics_sink(self):
+        if not hasattr(self, '_metrics_sink'):
+            self._metrics_sink = None
+            if metrics_enabled():
+                self._metrics_sink = self.context.spark.accumulator({}, MetricsAccumulatorParam())
+                atexit.register(log_metrics, self.metrics_snapshot)
+        return self._metrics_sink
+
+    def metrics_snapshot(self):
+        if self.metrics_sink is None:
+            return None
+        return copy.deepcopy(self.metrics_sink.value)
+
+    def compile(self, data_frame, *stages):
+        stages = data_frame.stages + stages
+        rdd = data_frame.source.rdd
+        if stages:
+            rdd = rdd.mapPartitions(self.pipeline(*stages))
+        return rdd
+
+    def pipeline(self, *stages):
+        if self.metrics_sink is None:
+            return Pipeline(stages)
+        return MeasuredPipeline(stages, self.metrics_sink)
+
+    def reduce_pipeline(self, reducer):
+        return self.pipeline(Stage(MAP, reducer))
+
+    def map_reduce(self, data_frame, map_function, reduce_function, combine_function=None, skew=False):
+        mapped_rdd = self.compile(data_frame, Stage(MAP, map_function))
+        if combine_function:
+            reducer = self.reduce_pipeline(combined_reducer_driver(reduce_function))
+            return self.from_rdd(mapped_rdd.reduceByKey(combine_function).mapPartitions(reducer), data_frame)
+
+        merge_function = getattr(reduce_function, 'merge_function', None)
+        if skew and merge_function:
+            return self.skewed_map_reduce(data_frame, mapped_rdd, reduce_function, merge_function)
+        elif skew:
+            log.warning('Reduce function %s is not mergeable, skewed keys will not be salted.', repr(reduce_function))
+
+        reducer = self.reduce_pipeline(reducer_driver(reduce_function))
+        return self.from_rdd(mapped_rdd.groupByKey().mapPartitions(reducer), data_frame)
+
+    def skewed_map_reduce(self, data_frame, mapped_rdd, reduce_function, merge_function):
+        settings = SkewSettings()
+        hot_keys = detect_hot_keys(
+            mapped_rdd.mapPartitions(SampleKeys(settings.sample_fraction)).collect(), settings.threshold
+        )
+        log.info('Salting hot keys %s.', repr(sorted(hot_keys)))
+
+        reduced_rdd = mapped_rdd.mapPartitions(SaltKeys(hot_keys, settings.salts)).groupByKey() \
+            .mapPartitions(self.reduce_pipeline(salted_reducer_driver(reduce_function))).cache()
+        partial = self.pipeline(Stage(FILTER, is_partial), Stage(MAP, to_partial))
+        merger = self.reduce_pipeline(reducer_driver(merge_function))
+        merged_rdd = reduced_rdd.mapPartitions(partial).groupByKey().mapPartitions(merger)
+        final_rdd = reduced_rdd.mapPartitions(self.pipeline(Stage(FILTER, is_final), Stage(MAP, to_final)))
+
+        result = self.from_rdd(final_rdd.union(merged_rdd), data_frame)
+        # Both sides of the union read the reduced records, they are kept in memory until the union has been computed.
+        result.persisted.append(reduced_rdd)
+        result.salted_keys = hot_keys
+        return result
+
+    def reduce_by_key(self, data_frame, map_function, combine_function):
+        return self.from_rdd(
+            self.compile(data_frame, Stage(MAP, map_function)).reduceByKey(combine_function), data_frame
+        )
 
-    def filter(self, data_frame, filter_function):
-        return self.from_rdd(data_frame.rdd.filter(filter_function))
+    def join(self, data_frame, other, key_function, other_key_function=None, how='inner'):
+        other_key_function = other_key_function or key_function
+        side, records = broadcast_side(data_frame, other, how)
+        if side == RIGHT:
+            log.info('Broadcasting the right side of the join.')
+            table = self.context.spark.broadcast(build_table(records, other_key_function))
+            join_stage = Stage(PARTITION, BroadcastJoin(table, key_function, keep_unmatched=(how == LEFT)))
+            return self.from_rdd(self.compile(data_frame, join_stage), data_frame, other)
+        elif side == LEFT:
+            log.info('Broadcasting the left side of the join.')
+            table = self.context.spark.broadcast(build_table(records, key_function))
+            join_stage = Stage(
+                PARTITION, BroadcastJoin(table, other_key_function, keep_unmatched=(how == RIGHT), swap=True)
+            )
+            return self.from_rdd(self.compile(other, join_stage), data_frame, other)
+
+        left_rdd = self.compile(data_frame, Stage(MAP, KeyBy(key_function)))
+        right_rdd = self.compile(other, Stage(MAP, KeyBy(other_key_function)))
+        return self.from_rdd(left_rdd.cogroup(right_rdd).flatMap(cogroup_joiner(how)), data_frame, other)
+
+    def union(self, data_frames):
+        rdd = self.context.spark.union([self.compile(data_frame) for data_frame in data_frames])
+        return self.from_rdd(rdd, *data_frames)
 
     def take(self, data_frame, n_records):
-        return data_frame.rdd.take(n_records)
+        return self.compile(data_frame).take(n_records)
 
     def collect(self, data_frame):
-        return data_frame.rdd.collect()
+        records = self.compile(data_frame).collect()
+        self.release(data_frame)
+        return records
+
+    def to_local_iterator(self, data_frame, prefetch_partitions=0):
+        rdd = self.compile(data_frame)
+        pool = ThreadPool(prefetch_partitions + 1)
+
+        def submit(index):
+            return pool.apply_async(self.context.spark.runJob, (rdd, list, [index]))
+
+        try:
+            for record in iterate_partitions(submit, rdd.getNumPartitions(), prefetch_partitions):
+                yield record
+        finally:
+            pool.terminate()
+            self.release(data_frame)
 
     def each(self, data_frame, each_function):
-        data_frame.rdd.foreach(each_function)
+        rdd = self.compile(data_frame)
+        if self.metrics_sink is not None:
+            rdd.foreachPartition(MeasuredEach(each_function, self.metrics_sink))
+        else:
+            rdd.foreach(each_function)
+        self.release(data_frame)
+
+    def each_partition(self, data_frame, each_function):
+        self.compile(data_frame).foreachPartition(each_function)
+        self.release(data_frame)
 
     def count(self, data_frame):
-        return data_frame.rdd.count()
+        n_records = self.compile(data_frame).count()
+        self.release(data_frame)
+        return n_records
 
     def cache(self, data_frame):
         table_name = getattr(data_frame, 'table_name', None)
-        if table_name:
+        if table_name and not data_frame.stages:
             self.context.hive.cacheTable(table_name)
         else:
-            data_frame.rdd.cache()
-
-    def to_table(self, data_frame, table_name=None, schema=None, primary_key=None):
+            # The cached DataFrame becomes the source of any DataFrame derived from it, so the stages that produced it
+            # are not evaluated again.
+            data_frame.rdd = self.compile(data_frame).cache()
+            data_frame.persisted = self.take_persisted(data_frame)
+            data_frame.source = data_frame
+            data_frame.stages = ()
+
+    def to_table(self, data_frame, table_name=None, schema=None, primary_key=None, append=False,
+                 skip_unchanged=False):
         if not table_name:
             table_name = getattr(data_frame, 'table_name', None)
             if not table_name:
                 raise ValueError('This DataFrame does not have a valid table name.')
 
+        rdd = self.compile(data_frame)
         schema = schema or getattr(data_frame, 'schema', None)
-        if not schema:
-            try:
-                rdd_schema = data_frame.rdd.schema()
-            except AttributeError:
+        try:
+            rdd_schema = rdd.schema()
+        except AttributeError:
+            if not schema:
                 try:
-                    schema_rdd = self.context.hive.inferSchema(data_frame.rdd.map(convert_namedtuple))
-                except (TypeError, ValueError):
+                    schema = data_frame.infer_schema(primary_key=primary_key)
+                except ValueError:
                     log.exception('Unable to infer schema for DataFrame.')
                     raise ValueError('This DataFrame does not have a valid schema.')
 
-                rdd_schema = schema_rdd.schema()
-            else:
-                schema_rdd = data_frame.rdd
+            from pyspark.sql import StructField, StructType
 
-            idea_schema_fields = []
-            for rdd_field in rdd_schema.fields:
-                data_type = FROM_RDD_TYPE[type(rdd_field.dataType)]
-                idea_schema_fields.append(Field(rdd_field.name, data_type))
-            schema = Schema(fields=idea_schema_fields, primary_key=primary_key)
+            struct_fields = []
+            for _, field in schema.fields.iteritems():
+                data_type = rdd_types()['to'][field.data_type]
+                struct_fields.append(StructField(field.name, data_type(), True))
+            rdd_schema = StructType(struct_fields)
+            # Records are converted to tuples in schema order as the schema is applied, in a single pass over the data.
+            row_rdd = rdd.mapPartitions(RowConverter(list(schema.fields.keys())))
+            schema_rdd = self.context.hive.applySchema(row_rdd, rdd_schema)
         else:
-            try:
-                rdd_schema = data_frame.rdd.schema()
-            except AttributeError:
-                struct_fields = []
-                for _, field in schema.fields.iteritems():
-                    data_type = TO_RDD_TYPE[field.data_type]
-                    struct_fields.append(StructField(field.name, data_type(), True))
-                rdd_schema = StructType(struct_fields)
-                schema_rdd = self.context.hive.applySchema(data_frame.rdd, rdd_schema)
-            else:
-                schema_rdd = data_frame.rdd
+            schema_rdd = rdd
+            if not schema:
+                idea_schema_fields = []
+                for rdd_field in rdd_schema.fields:
+                    data_type = rdd_types()['from'][type(rdd_field.dataType)]
+                    idea_schema_fields.append(Field(rdd_field.name, data_type))
+                schema = Schema(fields=idea_schema_fields, primary_key=primary_key)
 
         log.info('Saving table %s.', table_name)
         log.debug('Table Schema = %s.', str(schema))
@@ -145,6 +285,66 @@ class SparkEngine(object):
         schema_rdd.registerTempTable(temp_table_name)
         log.debug('Registered temporary table %s.', temp_table_name)
 
+        self.create_table(table_name, schema)
+
+        columns = [f.name for f in schema.fields_without_key()]
+        partition = ''
+        if schema.primary_key:
+            # Note that the partition columns must be the last columns in the select statement
+            partition = ' PARTITION({primary_key})'.format(primary_key=schema.primary_key.name)
+            columns += [schema.primary_key.name]
+
+        select_statement = 'SELECT {columns} FROM {temp_table_name}'.format(
+            temp_table_name=temp_table_name,
+            columns=','.join(columns),
+        )
+
+        changed = None
+        if skip_unchanged:
+            digests = format_digests(
+                self.context.hive.sql(select_statement).mapPartitions(PartitionDigests(bool(schema.primary_key)))
+                .reduceByKey(combine_digests).collectAsMap()
+            )
+            stored_digests = self.stored_digests(table_name)
+            changed = changed_partitions(digests, stored_digests)
+            log.info('%d of %d partitions of %s changed.', len(changed), len(digests), table_name)
+            if changed and schema.primary_key:
+                select_statement += ' WHERE {key_name} IN ({values})'.format(
+                    key_name=schema.primary_key.name,
+                    values=','.join(hive_literal(name) for name in changed)
+                )
+        else:
+            self.clear_digests(table_name)
+
+        if changed is None or changed:
+            self.context.hive.sql('INSERT {mode} TABLE {table_name}{partition} {select_statement}'.format(
+                mode='INTO' if append else 'OVERWRITE',
+                table_name=table_name,
+                partition=partition,
+                select_statement=select_statement,
+            ))
+
+        if changed:
+            stored_digests.update((name, digests[name]) for name in changed)
+            self.store_digests(table_name, stored_digests)
+            self.catalog.add_partitions(table_name, changed)
+        elif changed is None:
+            self.catalog.invalidate_partitions(table_name)
+        self.release(data_frame)
+
+        res_df = self.from_rdd(schema_rdd)
+        res_df.table_name = table_name
+        res_df.schema = schema
+        return res_df
+
+    def create_table(self, table_name, schema):
+        info = self.catalog.get(table_name)
+        if info and info.schema:
+            # The table was created or written by this process, so there is no need to ask the metastore about it.
+            if info.schema != schema:
+                raise ValueError('The schema of table {0} does not match {1}.'.format(table_name, str(schema)))
+            return
+
         create_table_statement = """
             CREATE TABLE IF NOT EXISTS {table_name} (
                 {column_defs}
@@ -160,49 +360,179 @@ class SparkEngine(object):
             )
         self.context.hive.sql(create_table_statement)
 
-        columns = [f.name for f in schema.fields_without_key()]
-        partition = ''
-        if schema.primary_key:
-            # Note that the partition columns must be the last columns in the select statement
-            partition = ' PARTITION({primary_key})'.format(primary_key=schema.primary_key.name)
-            columns += [schema.primary_key.name]
-
-        self.context.hive.sql('INSERT OVERWRITE TABLE {table_name}{partition} SELECT {columns} FROM {temp_table_name}'
-            .format(
-                table_name=table_name,
-                partition=partition,
-                temp_table_name=temp_table_name,
-                columns=','.join(columns),
+        # The table may have existed already, so the schema that is cached is the one the metastore reports.
+        table_schema = self.metastore_schema(table_name, schema)
+        if table_schema is None:
+            self.catalog.add_table(table_name)
+            return
+        self.catalog.add_table(table_name, table_schema)
+        if table_schema != schema:
+            raise ValueError('The schema of table {0} does not match {1}.'.format(table_name, str(schema)))
+
+    def metastore_schema(self, table_name, schema):
+        # The metastore lower-cases column names, they are reported using the spelling of the given schema.
+        names = dict((name.lower(), name) for name in schema.fields)
+        fields = []
+        for rdd_field in self.context.hive.table(table_name).schema().fields:
+            data_type = rdd_types()['from'].get(type(rdd_field.dataType))
+            if data_type is None:
+                log.debug('Not caching the schema of %s, column %s has an unknown type.', table_name, rdd_field.name)
+                return None
+            fields.append(Field(names.get(rdd_field.name.lower(), rdd_field.name), data_type))
+        primary_key = schema.primary_key.name if schema.primary_key else None
+        if primary_key not in [field.name for field in fields]:
+            primary_key = None
+        return Schema(fields=fields, primary_key=primary_key)
+
+    def table_exists(self, table_name):
+        if self.catalog.get(table_name) is None and not self.catalog.complete:
+            self.catalog.add_tables(row[0] for row in self.context.hive.sql('SHOW TABLES').collect())
+        return self.catalog.get(table_name) is not None
+
+    def partition_exists(self, table_name, value):
+        if not self.table_exists(table_name):
+            return False
+        _, values = self.table_partitions(table_name)
+        return partition_name(value) in values
+
+    def create_digest_table(self):
+        if self.catalog.get(DIGEST_TABLE) is None:
+            self.context.hive.sql(
+                'CREATE TABLE IF NOT EXISTS {digest_table} (partition_value STRING, digest STRING)'
+                ' PARTITIONED BY (table_name STRING)'.format(digest_table=DIGEST_TABLE)
+            )
+            self.catalog.add_table(DIGEST_TABLE)
+
+    def stored_digests(self, table_name):
+        self.create_digest_table()
+        rows = self.context.hive.sql(
+            'SELECT partition_value, digest FROM {digest_table} WHERE table_name = {table_name}'.format(
+                digest_table=DIGEST_TABLE,
+                table_name=hive_literal(table_name)
+            )
+        ).collect()
+        return dict((row[0], row[1]) for row in rows)
+
+    def store_digests(self, table_name, digests):
+        from pyspark.sql import StringType, StructField, StructType
+
+        self.create_digest_table()
+        temp_table_name = 'digests_' + generate_uuid()
+        self.context.hive.applySchema(
+            self.context.spark.parallelize(digests.items()),
+            StructType([StructField('partition_value', StringType(), True), StructField('digest', StringType(), True)])
+        ).registerTempTable(temp_table_name)
+        self.context.hive.sql(
+            'INSERT OVERWRITE TABLE {digest_table} PARTITION (table_name={table_name})'
+            ' SELECT partition_value, digest FROM {temp_table_name}'.format(
+                digest_table=DIGEST_TABLE,
+                table_name=hive_literal(table_name),
+                temp_table_name=temp_table_name
             )
         )
-
-        res_df = self.from_rdd(schema_rdd)
-        res_df.table_name = table_name
-        res_df.schema = schema
-        return res_df
+        self.catalog.add_partitions(DIGEST_TABLE, [table_name])
+
+    def clear_digests(self, table_name):
+        # Most writes never stored digests, the side table is neither created nor altered for them. The digests of
+        # each table are stored in a partition of their own, so listing those partitions tells which tables have some.
+        if not self.table_exists(DIGEST_TABLE):
+            return
+        _, digested_tables = self.table_partitions(DIGEST_TABLE)
+        if table_name not in digested_tables:
+            return
+        self.context.hive.sql('ALTER TABLE {digest_table} DROP IF EXISTS PARTITION (table_name={table_name})'.format(
+            digest_table=DIGEST_TABLE,
+            table_name=hive_literal(table_name)
+        ))
+        self.catalog.remove_partitions(DIGEST_TABLE, [table_name])
 
     def from_sql_query(self, query):
         rdd = self.context.hive.sql(query)
         return self.from_rdd(rdd)
 
-    def from_table(self, table_name):
-        rdd = self.context.hive.table(table_name)
+    def from_table(self, table_name, partitions=None, partition_filter=None):
+        if partitions is None and partition_filter is None:
+            rdd = self.context.hive.table(table_name)
+        else:
+            key_name, values = self.table_partitions(table_name)
+            selected = select_partitions(values, partitions, partition_filter)
+            log.info('Reading %d of %d partitions of %s.', len(selected), len(values), table_name)
+            condition = '1 = 0'
+            if selected:
+                # Hive prunes the partitions that are read using this predicate on the partition column.
+                condition = '{key_name} IN ({values})'.format(
+                    key_name=key_name,
+                    values=','.join(hive_literal(value) for value in selected)
+                )
+            rdd = self.context.hive.sql('SELECT * FROM {table_name} WHERE {condition}'.format(
+                table_name=table_name,
+                condition=condition
+            ))
         df = self.from_rdd(rdd)
         df.table_name = table_name
+        info = self.catalog.get(table_name)
+        if info and info.schema:
+            df.schema = info.schema
         return df
 
+    def table_partitions(self, table_name):
+        info = self.catalog.get(table_name)
+        if info is None or info.partitions is None:
+            key_name = None
+            values = []
+            for row in self.context.hive.sql('SHOW PARTITIONS {table_name}'.format(table_name=table_name)).collect():
+                key_name, _, value = row[0].partition('=')
+                values.append(urllib.unquote(value))
+            if info and info.schema and info.schema.primary_key:
+                key_name = info.schema.primary_key.name
+            self.catalog.set_partitions(table_name, key_name, values)
+            info = self.catalog.get(table_name)
+        return info.partition_key, sorted(info.partitions)
+
     def from_url(self, url):
         return self.from_rdd(self.context.spark.textFile(url))
 
     def from_list(self, data):
         return self.from_rdd(self.context.spark.parallelize(data))
 
-    def from_rdd(self, rdd):
+    def from_rdd(self, rdd, *parents):
         data_frame = DataFrame()
         data_frame.rdd = rdd
+        # RDDs cached to compute the parents are needed until the new DataFrame has been computed instead.
+        data_frame.persisted = self.take_persisted(*parents)
         return data_frame
 
+    def take_persisted(self, *data_frames):
+        persisted = []
+        for data_frame in data_frames:
+            persisted.extend(getattr(data_frame.source, 'persisted', ()))
+            data_frame.source.persisted = []
+        return persisted
+
+    def release(self, data_frame):
+        # Called once an action has computed the DataFrame, the RDDs that were cached to compute it are not needed
+        # anymore. Computing it again recomputes them.
+        for rdd in self.take_persisted(data_frame):
+            rdd.unpersist()
+
     def run(self, step):
+        if Configuration().get_nested('spark', 'server', 'enabled', default=False):
+            # Tasks are submitted to a long running session server that owns a single spark context, see server.py.
+            log.debug('Submitting %s to the spark session server.', step.path)
+            submit(step.path, step.args)
+            return
+
+        cmd, environment = self.command(step)
+        log.debug('Running spark-submit. cmd=%s, env=%s', str(cmd), str(environment))
+        subprocess.check_call(cmd, env=environment)
+
+    def command(self, step):
+        if Configuration().get_nested('spark', 'server', 'enabled', default=False):
+            return [sys.executable, '-m', 'edx.idea.spark.server', '--submit', step.path] + step.args, None
+        return self.spark_submit(step.path, step.args)
+
+    @staticmethod
+    def spark_submit(path, args):
         config = Configuration()
         home = config.get_env('spark', 'home', env_var='SPARK_HOME')
         master = config.get_env('spark', 'master', env_var='SPARK_MASTER', default='local[*]')
@@ -217,9 +547,7 @@ class SparkEngine(object):
         cmd = [
             '{home}/bin/spark-submit'.format(home=home),
             '--verbose',
-            step.path
-        ] + step.args
-
-        log.debug('Running spark-submit. cmd=%s, env=%s', str(cmd), str(environment))
+            path
+        ] + args
 
-        subprocess.check_call(cmd, env=environment)
+        return cmd, environment
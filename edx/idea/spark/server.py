@@ -0,0 +1,214 @@
+import argparse
+import errno
+import json
+import logging
+import os
+import socket
+import SocketServer
+import subprocess
+import sys
+import threading
+import traceback
+
+from edx.idea.common.files import private_directory, user_directory
+from edx.idea.config import Configuration
+
+
+log = logging.getLogger(__name__)
+
+
+class RemoteTaskError(Exception):
+    pass
+
+
+def server_address():
+    # The server runs arbitrary scripts on behalf of its clients, so it only listens on a unix domain socket in a
+    # directory that no other user can access.
+    path = Configuration().get_nested('spark', 'server', 'socket', default=None)
+    if not path:
+        return os.path.join(private_directory(user_directory()), 'spark-server.sock')
+    private_directory(os.path.dirname(os.path.abspath(path)))
+    return path
+
+
+def connect():
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(server_address())
+    except socket.error:
+        connection.close()
+        raise
+    return connection
+
+
+def request(message):
+    connection = connect()
+    try:
+        connection.sendall(json.dumps(message) + '\n')
+        response = connection.makefile('r').readline()
+    finally:
+        connection.close()
+    if not response:
+        raise RemoteTaskError('The spark session server closed the connection without a response.')
+    return json.loads(response)
+
+
+def submit(path, args):
+    response = request({
+        'command': 'run',
+        'path': os.path.abspath(path),
+        'args': args,
+        'cwd': os.getcwd(),
+        'environment': dict(os.environ),
+    })
+    if response['status'] != 'ok':
+        raise RemoteTaskError('Task {0} failed on the spark session server:\n{1}'.format(path, response['error']))
+
+
+# Spark 1.2 does not support concurrent access to the metastore through a single HiveContext, and tasks run with the
+# working directory, environment and sys.path of the client that submitted them, which are shared by the whole process.
+# Tasks are therefore run one at a time, in the order they are received.
+TASK_LOCK = threading.Lock()
+
+
+def run_task(path, args, cwd=None, environment=None):
+    cwd = cwd or os.getcwd()
+    directory = os.path.dirname(path)
+    with TASK_LOCK:
+        saved_cwd = os.getcwd()
+        saved_environ = dict(os.environ)
+        saved_argv = sys.argv
+        saved_modules = set(sys.modules)
+        # Like spark-submit, relative paths are resolved against the working directory of the client, and modules next
+        # to the script can be imported.
+        os.chdir(cwd)
+        if environment is not None:
+            os.environ.clear()
+            os.environ.update((name.encode('utf-8'), value.encode('utf-8')) for name, value in environment.iteritems())
+        sys.argv = [argument.encode('utf-8') for argument in [path] + list(args)]
+        sys.path.insert(0, directory)
+        try:
+            with open(path, 'r') as script_file:
+                code = compile(script_file.read(), path, 'exec')
+            # Unlike runpy, this leaves sys.modules['__main__'], the module of the server, alone.
+            exec(code, {'__name__': '__main__', '__file__': path, '__builtins__': __builtins__})
+        except SystemExit as exit:
+            if exit.code not in (None, 0):
+                raise
+        finally:
+            sys.path.remove(directory)
+            sys.argv = saved_argv
+            os.environ.clear()
+            os.environ.update(saved_environ)
+            os.chdir(saved_cwd)
+            # Modules imported from the directory of the script are imported again by the next task, which may have
+            # changed them.
+            for name in set(sys.modules) - saved_modules:
+                module_path = getattr(sys.modules[name], '__file__', None) or ''
+                if os.path.dirname(os.path.abspath(module_path)) == directory:
+                    del sys.modules[name]
+
+
+class SessionHandler(SocketServer.StreamRequestHandler):
+
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            # Clients that check whether the server is running connect without sending a request.
+            return
+        message = json.loads(line)
+        command = message.get('command')
+        if command == 'run':
+            response = self.run(
+                message['path'], message.get('args', []), message.get('cwd'), message.get('environment')
+            )
+        elif command == 'stop':
+            # shutdown() blocks until serve_forever() returns, which waits for this request to be handled.
+            threading.Thread(target=self.server.shutdown).start()
+            response = {'status': 'ok'}
+        else:
+            response = {'status': 'error', 'error': 'Unknown command {0}.'.format(command)}
+        self.wfile.write(json.dumps(response) + '\n')
+
+    def run(self, path, args, cwd=None, environment=None):
+        log.info('Executing %s %s.', path, ' '.join(args))
+        try:
+            run_task(path, args, cwd, environment)
+        except BaseException:
+            # A failing task is reported to the client that submitted it, the session stays available to other tasks.
+            log.exception('%s failed.', path)
+            return {'status': 'error', 'error': traceback.format_exc()}
+        log.info('%s complete.', path)
+        return {'status': 'ok'}
+
+
+class SessionServer(SocketServer.ThreadingMixIn, SocketServer.UnixStreamServer):
+    daemon_threads = True
+
+    def server_close(self):
+        SocketServer.UnixStreamServer.server_close(self)
+        os.remove(self.server_address)
+
+
+def remove_stale_socket(path):
+    try:
+        connection = connect()
+    except socket.error as error:
+        if error.errno == errno.ECONNREFUSED:
+            os.remove(path)
+        elif error.errno != errno.ENOENT:
+            raise
+        return
+    connection.close()
+    raise RuntimeError('A spark session server is already listening on {0}.'.format(path))
+
+
+def serve():
+    from edx.idea.spark.context import Context
+
+    # The context is created before accepting tasks so that the first task does not pay for its start up.
+    context = Context()
+    address = server_address()
+    remove_stale_socket(address)
+    server = SessionServer(address, SessionHandler)
+    log.info('Spark session server listening on %s.', address)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        context.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a spark session server that executes workflow tasks.')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--stop', action='store_true', help='stop the running server')
+    group.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    group.add_argument('--submit', nargs=argparse.REMAINDER, help='submit a task script and its arguments')
+    args = parser.parse_args()
+
+    if args.stop:
+        request({'command': 'stop'})
+    elif args.serve:
+        from edx.idea.plugin import PluginManager
+
+        # Configures logging.
+        PluginManager()
+        serve()
+    elif args.submit:
+        try:
+            submit(args.submit[0], args.submit[1:])
+        except RemoteTaskError as error:
+            sys.stderr.write(str(error) + '\n')
+            sys.exit(1)
+    else:
+        from edx.idea.spark.engine import SparkEngine
+
+        # The server itself must be started by spark-submit.
+        path = os.path.splitext(os.path.abspath(__file__))[0] + '.py'
+        cmd, environment = SparkEngine.spark_submit(path, ['--serve'])
+        subprocess.check_call(cmd, env=environment)
+
+
+if __name__ == '__main__':
+    main()
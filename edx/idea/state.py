@@ -0,0 +1,142 @@
+import json
+import logging
+import os
+import tempfile
+
+from edx.idea.common.files import private_directory, replace_file, user_directory
+from edx.idea.common.identifier import generate_uuid
+from edx.idea.config import Configuration
+from edx.idea.fingerprint import fingerprint, url_fingerprint, UnknownFingerprint
+from edx.idea.partition import partition_name
+
+
+log = logging.getLogger(__name__)
+
+
+class StateStore(object):
+
+    def __init__(self, path=None):
+        self.path = path or Configuration().get_nested(
+            'executor', 'state', default=os.path.join(tempfile.gettempdir(), 'idea', 'state.json')
+        )
+        self.tasks = {}
+        self.tables = {}
+        self.partitions = {}
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as state_file:
+                state = json.load(state_file)
+            self.tasks = state.get('tasks', {})
+            self.tables = state.get('tables', {})
+            self.partitions = state.get('partitions', {})
+
+    def save(self):
+        # Without a saved state the tasks are run again next time, which is safer than failing the running workflow.
+        try:
+            replace_file(self.path, self.write)
+        except (IOError, OSError):
+            log.warning('Unable to write the workflow state to %s.', self.path, exc_info=True)
+
+    def write(self, state_file):
+        json.dump(
+            {'tasks': self.tasks, 'tables': self.tables, 'partitions': self.partitions},
+            state_file, indent=2, sort_keys=True
+        )
+
+    def input_fingerprint(self, target):
+        table_name = target_table(target)
+        if table_name:
+            # Tables have no cheap fingerprint of their own, instead every run of a task that writes to one records a
+            # new version of it. Tables that are not written by any task that declares them as an output are unknown.
+            version = self.tables.get(table_name.lower())
+            if version is None:
+                raise UnknownFingerprint()
+            return ('table', table_name.lower(), version)
+        return ('url', target, url_fingerprint(target))
+
+    def task_fingerprint(self, task):
+        if not task.inputs and not task.outputs:
+            return None
+        try:
+            return fingerprint((
+                task.path,
+                task.args,
+                url_fingerprint(task.path),
+                [self.input_fingerprint(target) for target in task.inputs]
+            ))
+        except UnknownFingerprint:
+            return None
+
+    def is_up_to_date(self, task, task_fingerprint):
+        if task_fingerprint is None or self.tasks.get(task.name) != task_fingerprint:
+            return False
+        return all(self.output_exists(target) for target in task.outputs)
+
+    def output_exists(self, target):
+        # Tables are only known to exist if a task recorded writing them. Checking with the engine would require a
+        # connection to the metastore, and for spark a whole spark context, in the executor.
+        table_name = target_table(target)
+        if table_name:
+            if 'partition' in target:
+                return partition_name(target['partition']) in self.partitions.get(table_name.lower(), [])
+            return table_name.lower() in self.tables
+        try:
+            url_fingerprint(target)
+        except UnknownFingerprint:
+            return False
+        return True
+
+    def record(self, task, task_fingerprint):
+        if task_fingerprint is not None:
+            self.tasks[task.name] = task_fingerprint
+        for target in task.outputs:
+            table_name = target_table(target)
+            if table_name:
+                self.tables[table_name.lower()] = generate_uuid()
+                if 'partition' in target:
+                    partitions = self.partitions.setdefault(table_name.lower(), [])
+                    if partition_name(target['partition']) not in partitions:
+                        partitions.append(partition_name(target['partition']))
+
+
+def target_table(target):
+    if isinstance(target, dict):
+        return target['table']
+    return None
+
+
+class TaskHistory(object):
+
+    def __init__(self, path=None, size=10):
+        self.path = path or Configuration().get_nested('executor', 'history', default=None)
+        if not self.path:
+            try:
+                self.path = os.path.join(private_directory(user_directory()), 'history.json')
+            except (OSError, ValueError):
+                log.warning('Unable to use a private directory for the task history.', exc_info=True)
+        self.size = size
+        self.durations = {}
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as history_file:
+                    self.durations = json.load(history_file)
+            except (IOError, ValueError):
+                log.warning('Unable to read the task history from %s.', self.path, exc_info=True)
+
+    def expected_duration(self, name):
+        durations = sorted(self.durations.get(name, []))
+        if not durations:
+            return None
+        return durations[len(durations) / 2]
+
+    def record(self, name, duration):
+        self.durations[name] = (self.durations.get(name, []) + [duration])[-self.size:]
+        if not self.path:
+            return
+        # The history only guides speculation, failing to save it must not fail the workflow.
+        try:
+            replace_file(self.path, self.write)
+        except (IOError, OSError):
+            log.warning('Unable to write the task history to %s.', self.path, exc_info=True)
+
+    def write(self, history_file):
+        json.dump(self.durations, history_file, indent=2, sort_keys=True)
@@ -19,9 +19,17 @@ class Workflow(object):
 
     @staticmethod
     def from_struct(struct):
-        phases = [Phase.from_struct(p) for p in struct['phases']]
+        if 'tasks' in struct:
+            # Workflows without phases are a single phase, the order of the tasks is determined by their dependencies.
+            phases = [Phase.from_struct(struct)]
+        else:
+            phases = [Phase.from_struct(p) for p in struct['phases']]
         return Workflow(phases=phases, name=struct.get('name'))
 
+    @property
+    def tasks(self):
+        return [task for phase in self.phases for task in phase.tasks]
+
 
 class Phase(object):
 
@@ -46,16 +54,36 @@ class Phase(object):
 
 class Task(object):
 
-    def __init__(self, path, args=None, name=None):
+    def __init__(self, path, args=None, name=None, inputs=None, outputs=None, depends_on=None, resources=None,
+                 retries=None, retry_delay=None):
         self.path = path
         self.args = args or []
         self.name = name or ('task_' + generate_uuid())
+        # Inputs and outputs are either URLs or dictionaries that refer to a table, for example {'table': 'answers'}.
+        self.inputs = inputs or []
+        self.outputs = outputs or []
+        # The names of the tasks that must complete before this one starts, None if they are implied by the phases.
+        self.depends_on = depends_on
+        # The amount of each resource, like cores or memory, the task occupies while it is running.
+        self.resources = resources or {}
+        # None uses the defaults from the executor configuration.
+        self.retries = retries
+        self.retry_delay = retry_delay
 
     def __repr__(self):
-        return 'Task(path={0}, args={1}, name={2})'.format(
+        return (
+            'Task(path={0}, args={1}, name={2}, inputs={3}, outputs={4}, depends_on={5}, resources={6}, '
+            'retries={7}, retry_delay={8})'
+        ).format(
             repr(self.path),
             repr(self.args),
-            repr(self.name)
+            repr(self.name),
+            repr(self.inputs),
+            repr(self.outputs),
+            repr(self.depends_on),
+            repr(self.resources),
+            repr(self.retries),
+            repr(self.retry_delay)
         )
 
     def __str__(self):
@@ -63,4 +91,14 @@ class Task(object):
 
     @staticmethod
     def from_struct(struct):
-        return Task(path=struct['path'], args=struct.get('args'), name=struct.get('name'))
+        return Task(
+            path=struct['path'],
+            args=struct.get('args'),
+            name=struct.get('name'),
+            inputs=struct.get('inputs'),
+            outputs=struct.get('outputs'),
+            depends_on=struct.get('depends_on'),
+            resources=struct.get('resources'),
+            retries=struct.get('retries'),
+            retry_delay=struct.get('retry_delay')
+        )
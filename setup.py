@@ -18,12 +18,12 @@ setup(
         'edx',
         'edx.idea',
         'edx.idea.common',
+        'edx.idea.local',
         'edx.idea.spark'
     ],
     long_description=read('README.md'),
     install_requires=[
         'PyYAML==3.10',
-        'stevedore==1.1.0',
         'jinja2'
     ],
     extras_require={
@@ -36,12 +36,20 @@ setup(
         'examples': [
             'python-dateutil',
         ],
+        'local': [
+            'cloudpickle',
+        ],
+        'numpy': [
+            'numpy',
+        ],
     },
     entry_points={
         'console_scripts': [
             'idea = edx.idea.executor:main',
+            'idea-spark-server = edx.idea.spark.server:main',
         ],
         'edx.idea.engine': [
+            'local = edx.idea.local.engine:LocalEngine',
             'spark = edx.idea.spark.engine:SparkEngine',
         ]
     }